@@ -1,65 +1,87 @@
 import os
 import json
 import openai
-import pandas as pd
 from dotenv import load_dotenv
 from tqdm import tqdm
-from openpyxl import load_workbook
+from excel_sink import ExcelSink
+from live_journal import append_entry, compact, ensure_journal, journal_path_for, read_entries
 from datetime import datetime
 import glob
+import re
+from collections import deque
+from verification_cache import VerificationCache
+from fire_preclassifier import load_preclassifier, LLM_VERDICTS_PATH
+from incident_clusters import IncidentClusterIndex
+from query_scheduler import record_verified_yield
+from run_metrics import METRICS, timed_completion
+from prompt_builder import verification_messages, score_messages, combined_messages
+from raw_tweet_store import tweet_key
+from run_checkpoint import RunCheckpoint, checkpoint_path
+from incident_store import IncidentStore
 
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 client = openai
 
+# Rebuild live_verified_fires*.json from its journal every N verified rows
+LIVE_JSON_COMPACT_EVERY = int(os.getenv("LIVE_JSON_COMPACT_EVERY", "25"))
+
+MODEL = "gpt-4o-mini"
+# Tweets verified at once when > 1 (see async_verifier.py); 1 keeps the sequential loop
+VERIFIER_CONCURRENCY = int(os.getenv("VERIFIER_CONCURRENCY", "1"))
+# "two_call": yes/no prompt then a 0-10 score prompt for each "yes".
+# "combined": one JSON call returns verdict and score for VERIFIER_BATCH_SIZE tweets.
+VERIFIER_MODE = os.getenv("VERIFIER_MODE", "two_call")
+VERIFIER_BATCH_SIZE = int(os.getenv("VERIFIER_BATCH_SIZE", "1"))
+# Bump when a prompt changes so cached verdicts from the old wording are not reused
+PROMPT_VERSION = {"two_call": "two_call-3", "combined": "combined-3"}.get(VERIFIER_MODE, VERIFIER_MODE)
+VERIFICATION_CACHE = os.getenv("VERIFICATION_CACHE", "1") == "1"
+# Gate LLM calls with the local pre-classifier when a trained model exists
+PRECLASSIFIER = os.getenv("PRECLASSIFIER", "1") == "1"
+# Verify one tweet per near-duplicate cluster and copy its verdict to the rest
+CLUSTER_DEDUP = os.getenv("CLUSTER_DEDUP", "0") == "1"
+# Email the verified batch when done; off for benchmark and test runs
+VERIFIER_SEND_EMAIL = os.getenv("VERIFIER_SEND_EMAIL", "1") == "1"
+# Also file verified rows into the day-partitioned incident store
+INCIDENT_STORE = os.getenv("INCIDENT_STORE", "1") == "1"
+# Verdict used when the API call itself failed; never cached
+API_ERROR_RESULT = "no (OpenAI API error)"
+
+def build_score_messages(content):
+    return score_messages(content)
+
+def parse_fire_related_score(answer):
+    match = re.search(r'\b(10|[0-9])\b', answer)
+    if match:
+        return int(match.group(1))
+    return answer
+
 def get_fire_related_score(content):
-    prompt = (
-        "On a scale of 0 to 10, how strongly is the following tweet related to fire damages or destruction in the United States? "
-        "A score of 0 means not related at all, 10 means it is definitely about fire damages or destruction in the USA. "
-        "Only use the tweet content for your evaluation.\n\n"
-        f"Tweet content: {content[:2000]}"
-    )
-    messages = [
-        {"role": "system", "content": "You are an AI that rates the fire-relatedness of tweets about fire damages or destruction in the USA. Respond with a single integer from 0 to 10."},
-        {"role": "user", "content": prompt}
-    ]
+    messages = build_score_messages(content)
     try:
-        ai_response = client.chat.completions.create(
-            model='gpt-4o-mini',
+        ai_response = timed_completion(
+            client, "score",
+            model=MODEL,
             messages=messages,
             temperature=0,
         )
         answer = ai_response.choices[0].message.content.strip()
-        import re
-        match = re.search(r'\b(10|[0-9])\b', answer)
-        if match:
-            return int(match.group(1))
-        return answer
+        return parse_fire_related_score(answer)
     except Exception as e:
         print(f"Error with OpenAI API (score): {e}")
         return ""
 
+def build_verification_messages(content, url):
+    # The URL is left out of the prompt; only the content decides the verdict
+    return verification_messages(content)
+
 def verify_fire_incident(title, content, url, country="USA"):
     print(url)
-    truncated_content = content[:4000]
-    fire_incident_prompt = (
-        "You are given the content of a tweet or news snippet. Determine if it describes a fire incident in the United States that likely caused damage to physical structures (such as homes, apartments, offices, commercial buildings, factories, or infrastructure). "
-        "The fire may have resulted in structural damage or destruction, due to causes like electrical faults, negligence, accidents, natural disasters (e.g., wildfires), or arson. "
-        "Be inclusive: If the tweet/news suggests a fire incident with possible or likely damage to structures, even if not 100% explicit, respond with 'yes'. "
-        "Respond with 'yes' if the tweet/news is about a fire incident in the USA that could have caused damage to physical structures. Otherwise, respond with 'no'.\n\n"
-        f"Content: {truncated_content}\nURL: {url}\n"
-        "Only use the provided content for your evaluation. Do not infer or assume details not present in the text, but err on the side of inclusion if the fire incident is plausible."
-    )
-    messages = [
-        {
-            "role": "system",
-            "content": "You are an AI tasked with evaluating tweets to determine if they describe fire damages or destruction in the United States. Be inclusive: If the tweet/news is plausibly about fire damages or destruction in the USA, mark as 'yes'."
-        },
-        {"role": "user", "content": fire_incident_prompt}
-    ]
+    messages = build_verification_messages(content, url)
     try:
-        ai_response = client.chat.completions.create(
-            model='gpt-4o-mini',
+        ai_response = timed_completion(
+            client, "verify",
+            model=MODEL,
             messages=messages,
             temperature=0,
         )
@@ -68,81 +90,235 @@ def verify_fire_incident(title, content, url, country="USA"):
         return answer
     except Exception as e:
         print(f"Error with OpenAI API: {e}")
-        return "no"
+        return API_ERROR_RESULT
 
-def update_live_json(live_json_path, entry):
-    import threading
-    lock = threading.Lock()
-    lock.acquire()
+def build_combined_messages(contents):
+    return combined_messages(contents)
+
+def parse_combined_response(answer, count):
+    # Returns one (verdict, score) per input id; None where the model left an id out
+    results = [None] * count
     try:
-        if os.path.exists(live_json_path):
-            with open(live_json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        else:
-            data = []
-        data.append(entry)
-        with open(live_json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    finally:
-        lock.release()
-
-def autosize_and_format_excel(excel_path):
-    from openpyxl.utils import get_column_letter
-    wb = load_workbook(excel_path)
-    ws = wb.active
-    default_width = 30
-    for col in ws.columns:
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = default_width
-        for cell in col:
-            cell.alignment = cell.alignment.copy(wrap_text=True)
-    for row in ws.iter_rows():
-        max_height = 15
-        for cell in row:
-            if cell.value:
-                lines = str(cell.value).count("\n") + 1
-                length = len(str(cell.value))
-                est_height = max(15, min(150, lines * 15 + length // 50 * 15))
-                if est_height > max_height:
-                    max_height = est_height
-        ws.row_dimensions[row[0].row].height = max_height
-    url_col = None
-    for idx, cell in enumerate(ws[1], 1):
-        if cell.value and str(cell.value).lower() == "url":
-            url_col = idx
-            break
-    if url_col:
-        for row in ws.iter_rows(min_row=2, min_col=url_col, max_col=url_col):
-            for cell in row:
-                if cell.value and str(cell.value).startswith("http"):
-                    cell.hyperlink = cell.value
-                    cell.style = "Hyperlink"
-    wb.save(excel_path)
-
-def verify_and_save_to_excel(cleaned_json_path, excel_path=None, live_json_path=None):
+        entries = json.loads(answer).get("results", [])
+    except (ValueError, AttributeError):
+        return results
+    for entry in entries:
+        try:
+            idx = int(entry["id"])
+            verdict = "yes" if str(entry["verdict"]).strip().lower().startswith("yes") else "no"
+            score = max(0, min(10, int(entry.get("score", 0))))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= idx < count:
+            results[idx] = (verdict, score if verdict == "yes" else 0)
+    return results
+
+def verify_fire_incidents_combined(contents):
+    messages = build_combined_messages(contents)
+    try:
+        ai_response = timed_completion(
+            client, "combined",
+            model=MODEL,
+            messages=messages,
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+        answer = ai_response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Error with OpenAI API (combined): {e}")
+        answer = ""
+    results = parse_combined_response(answer, len(contents))
+    if len(contents) > 1:
+        # Re-ask individually for any tweet the batch answer dropped
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = verify_fire_incidents_combined([contents[i]])[0]
+    return [result or (API_ERROR_RESULT, 0) for result in results]
+
+def iter_batches(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_verified_combined(tweets, batch_size=VERIFIER_BATCH_SIZE):
+    for batch in iter_batches(tweets, batch_size):
+        results = verify_fire_incidents_combined([tweet.get("content", "") for tweet in batch])
+        for tweet, (verification_result, fire_related_score) in zip(batch, results):
+            yield tweet, verification_result, fire_related_score
+
+def iter_verified_sequentially(tweets):
+    for tweet in tweets:
+        content = tweet.get("content", "")
+        verification_result = verify_fire_incident(content[:100], content, tweet.get("tweet_url", ""), country="USA")
+        fire_related_score = get_fire_related_score(content) if verification_result.lower().startswith("yes") else 0
+        yield tweet, verification_result, fire_related_score
+
+def iter_verified_with_api(tweets):
+    if VERIFIER_CONCURRENCY > 1:
+        from async_verifier import iter_verified_concurrently
+        return iter_verified_concurrently(
+            tweets, concurrency=VERIFIER_CONCURRENCY, mode=VERIFIER_MODE, batch_size=VERIFIER_BATCH_SIZE
+        )
+    if VERIFIER_MODE == "combined":
+        return iter_verified_combined(tweets)
+    return iter_verified_sequentially(tweets)
+
+def iter_verified_with_shortcut(tweets, lookup, verify):
+    # lookup(tweet) returns (verification_result, score) to answer a tweet
+    # locally, or None to send it through verify(). Output keeps input order.
+    decided = deque()
+
+    def undecided():
+        for tweet in tweets:
+            result = lookup(tweet)
+            decided.append((tweet, result))
+            if result is None:
+                yield tweet
+
+    def flush_decided():
+        while decided and decided[0][1] is not None:
+            tweet, (verification_result, fire_related_score) = decided.popleft()
+            yield tweet, verification_result, fire_related_score
+
+    for tweet, verification_result, fire_related_score in verify(undecided()):
+        yield from flush_decided()
+        decided.popleft()
+        yield tweet, verification_result, fire_related_score
+    yield from flush_decided()
+
+def record_llm_verdicts(results, cache=None, path=LLM_VERDICTS_PATH):
+    # Every real LLM answer goes to the cache and to the label log the
+    # pre-classifier trains on; API failures go to neither
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for tweet, verification_result, fire_related_score in results:
+            if verification_result != API_ERROR_RESULT and fire_related_score != "":
+                content = tweet.get("content", "")
+                if cache:
+                    cache.put(content, verification_result, fire_related_score)
+                f.write(json.dumps({"content": content, "verdict": verification_result, "score": fire_related_score}, ensure_ascii=False) + "\n")
+                f.flush()
+            yield tweet, verification_result, fire_related_score
+
+def iter_verified_clustered(tweets, verify, clusters):
+    # Only the first tweet of each near-duplicate cluster goes through
+    # verify(); later members copy its verdict. Output keeps input order.
+    waiting = deque()
+    sent = deque()
+    verdicts = {}
+
+    def representatives():
+        for tweet in tweets:
+            doc_id, cluster_id = clusters.add(tweet.get("content", ""))
+            waiting.append((tweet, cluster_id))
+            if doc_id == cluster_id:
+                sent.append(cluster_id)
+                yield tweet
+
+    def flush_resolved():
+        while waiting and waiting[0][1] in verdicts:
+            tweet, cluster_id = waiting.popleft()
+            yield (tweet, *verdicts[cluster_id])
+
+    for _, verification_result, fire_related_score in verify(representatives()):
+        verdicts[sent.popleft()] = (verification_result, fire_related_score)
+        yield from flush_resolved()
+    yield from flush_resolved()
+
+def with_shortcut(lookup, verify):
+    def verify_rest(pending):
+        return iter_verified_with_shortcut(pending, lookup, verify)
+    return verify_rest
+
+def iter_verified(tweets, cache=None, preclassifier=None, clusters=None):
+    # cache hit -> near-duplicate of an earlier tweet -> confident pre-classifier decision -> OpenAI
+    def verify(pending):
+        return record_llm_verdicts(iter_verified_with_api(pending), cache)
+
+    if preclassifier is not None:
+        verify = with_shortcut(preclassifier.decide, verify)
+    if clusters is not None:
+        verify_representatives = verify
+
+        def verify(pending):
+            return iter_verified_clustered(pending, verify_representatives, clusters)
+    if cache is not None:
+        verify = with_shortcut(lambda tweet: cache.get(tweet.get("content", "")), verify)
+    return verify(tweets)
+
+def update_live_json(live_json_path, entry):
+    # O(1) locked append to the journal; compact_live_json rebuilds the JSON array
+    with METRICS.timer("json.append"):
+        append_entry(journal_path_for(live_json_path), entry)
+
+def compact_live_json(live_json_path):
+    if not os.path.exists(journal_path_for(live_json_path)):
+        return 0
+    with METRICS.timer("json.compact"):
+        return compact(journal_path_for(live_json_path), live_json_path)
+
+def verify_and_save_to_excel(cleaned_json_path, excel_path=None, live_json_path=None, resume=False):
+    with open(cleaned_json_path, "r", encoding="utf-8") as f:
+        tweets = json.load(f)
+    checkpoint_name = "verify_" + os.path.splitext(os.path.basename(cleaned_json_path))[0]
+    return verify_and_save_tweets(tweets, excel_path, live_json_path, total=len(tweets), checkpoint_name=checkpoint_name, resume=resume)
+
+def restore_missing_excel_rows(excel_sink, live_json_path):
+    # The journal is fsync'd per row but the workbook only every few rows, so
+    # after a crash the workbook can be missing rows the journal has
+    entries, _ = read_entries(journal_path_for(live_json_path))
+    present = {(row.get("url"), row.get("content")) for row in excel_sink.rows}
+    missing = [row for row in entries if (row.get("url"), row.get("content")) not in present]
+    for row in missing:
+        excel_sink.append(row)
+    return len(missing)
+
+def verify_and_save_tweets(tweets, excel_path=None, live_json_path=None, total=None, checkpoint_name=None, resume=False):
+    # `tweets` may be any iterable, including a live feed from the crawler.
+    # With checkpoint_name every verdict is checkpointed; resume=True skips
+    # tweets verified by the interrupted run and keeps writing its output files.
     import os
-    import pandas as pd
     # Generate timestamped filenames
     dt_str = datetime.now().strftime('%d%b_%H%M').lower()
     if excel_path is None:
         excel_path = f"output/verified_fires_{dt_str}.xlsx"
     if live_json_path is None:
         live_json_path = f"output/live_verified_fires_{dt_str}.json"
+    checkpoint = None
+    if checkpoint_name:
+        checkpoint = RunCheckpoint(checkpoint_path(checkpoint_name), resume, {"excel_path": excel_path, "live_json_path": live_json_path})
+        excel_path, live_json_path = checkpoint.meta["excel_path"], checkpoint.meta["live_json_path"]
     os.makedirs(os.path.dirname(excel_path), exist_ok=True)
     os.makedirs(os.path.dirname(live_json_path), exist_ok=True)
-    with open(cleaned_json_path, "r", encoding="utf-8") as f:
-        tweets = json.load(f)
+    ensure_journal(live_json_path)
     verified_rows = []
-    for tweet in tqdm(tweets, desc="Verifying tweets with AI"):
+    verified_tweets = []
+    excel_sink = ExcelSink(excel_path)
+    if checkpoint and checkpoint.resumed:
+        done = {entry["key"] for entry in checkpoint.entries if "key" in entry}
+        restored = restore_missing_excel_rows(excel_sink, live_json_path)
+        print(f"⏯️ Resuming verification: {len(done)} tweets already verified, {restored} rows restored to {excel_path}")
+        tweets = (tweet for tweet in tweets if tweet_key(tweet) not in done)
+        total = max(total - len(done), 0) if total is not None else None
+    cache = VerificationCache(prompt_version=PROMPT_VERSION, model=MODEL) if VERIFICATION_CACHE else None
+    preclassifier = load_preclassifier() if PRECLASSIFIER else None
+    clusters = IncidentClusterIndex() if CLUSTER_DEDUP else None
+    incident_store = IncidentStore() if INCIDENT_STORE else None
+    results = iter_verified(tweets, cache, preclassifier, clusters)
+    for tweet, verification_result, fire_related_score in tqdm(results, total=total, desc="Verifying tweets with AI"):
         title = tweet.get("content", "")[:100]
         content = tweet.get("content", "")
         date = tweet.get("timestamp", "")
         url = tweet.get("tweet_url", "")
         source = tweet.get("username", "")
-        verification_result = verify_fire_incident(title, content, url, country="USA")
-        fire_related_score = get_fire_related_score(content) if verification_result.lower().startswith("yes") else 0
         verified_at = datetime.now().isoformat()
         print(f"{date} {verification_result.strip().lower()} {url}")
+        METRICS.incr("verify.yes" if verification_result.lower().startswith("yes") else "verify.no")
         if verification_result.lower().startswith("yes"):
             row = {
                 "title": title,
@@ -155,18 +331,33 @@ def verify_and_save_to_excel(cleaned_json_path, excel_path=None, live_json_path=
                 "verified_at": verified_at
             }
             verified_rows.append(row)
+            verified_tweets.append(tweet)
             update_live_json(live_json_path, row)
-            if os.path.exists(excel_path):
-                df_existing = pd.read_excel(excel_path)
-                df_new = pd.DataFrame([row])
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-                df_combined.to_excel(excel_path, index=False)
-            else:
-                df = pd.DataFrame([row])
-                df.to_excel(excel_path, index=False)
-            autosize_and_format_excel(excel_path)
+            if len(verified_rows) % LIVE_JSON_COMPACT_EVERY == 0:
+                compact_live_json(live_json_path)
+            if incident_store:
+                incident_store.add([row])
+            excel_sink.append(row)
+        # After the journal append, so a checkpointed "yes" always has its row;
+        # API errors stay unrecorded and are retried on resume
+        if checkpoint and verification_result != API_ERROR_RESULT:
+            checkpoint.record({"key": tweet_key(tweet), "verdict": verification_result, "score": fire_related_score})
+    if checkpoint:
+        checkpoint.finish()
+    if cache:
+        cache.report()
+        cache.close()
+    if preclassifier:
+        preclassifier.report()
+    if clusters:
+        clusters.report()
+    # Feeds the crawl scheduler's per-query yield
+    record_verified_yield(verified_tweets)
+    excel_sink.close()
+    compact_live_json(live_json_path)
     if verified_rows:
         print(f"✅ Saved {len(verified_rows)} verified fire incidents to {excel_path} and {live_json_path}")
+    if verified_rows and VERIFIER_SEND_EMAIL:
         import smtplib
         from email.message import EmailMessage
         EMAIL_HOST = 'smtp.gmail.com'
@@ -196,14 +387,17 @@ def verify_and_save_to_excel(cleaned_json_path, excel_path=None, live_json_path=
             attachment_paths=[excel_path, live_json_path]
         )
         print(f"📧 Email sent to {TO_EMAIL} with attachments {excel_path} and {live_json_path}")
-    else:
+    elif not verified_rows:
         print("No verified fire incidents found.")
 
 if __name__ == "__main__":
     import sys
     dt_str = datetime.now().strftime('%d%b_%H%M').lower()
-    if len(sys.argv) > 1:
-        json_path = sys.argv[1]
+    # --resume continues an interrupted run on the same file and output paths
+    resume = "--resume" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != "--resume"]
+    if args:
+        json_path = args[0]
     else:
         filtered_files = sorted(glob.glob("*_cleaned_tweets.json"), reverse=True)
         if filtered_files:
@@ -214,4 +408,6 @@ if __name__ == "__main__":
             exit(1)
     excel_path = f"output/verified_fires_{dt_str}.xlsx"
     live_json_path = f"output/live_verified_fires_{dt_str}.json"
-    verify_and_save_to_excel(json_path, excel_path, live_json_path) 
\ No newline at end of file
+    METRICS.serve()
+    verify_and_save_to_excel(json_path, excel_path, live_json_path, resume=resume)
+    METRICS.write_summary() 
\ No newline at end of file
@@ -0,0 +1,194 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+import openai
+from ai_fire_verifier import (
+    MODEL,
+    build_verification_messages,
+    build_score_messages,
+    parse_fire_related_score,
+    build_combined_messages,
+    parse_combined_response,
+    iter_batches,
+    API_ERROR_RESULT,
+)
+from run_metrics import METRICS
+from prompt_builder import message_tokens
+
+# Account limits the limiter keeps under; defaults match gpt-4o-mini tier 1
+VERIFIER_RPM = int(os.getenv("VERIFIER_RPM", "500"))
+VERIFIER_TPM = int(os.getenv("VERIFIER_TPM", "200000"))
+VERIFIER_MAX_RETRIES = int(os.getenv("VERIFIER_MAX_RETRIES", "5"))
+
+def estimate_tokens(messages, completion_tokens=5):
+    # Corrected from usage after each call
+    return message_tokens(messages) + completion_tokens
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        # Waiters queue on the lock, so capacity is handed out first come first served
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def settle(self, extra):
+        # Charge (or refund) the difference between the estimate and real usage
+        self._refill()
+        self.tokens -= extra
+
+def _is_retryable(error):
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def _retry_delay(error, attempt):
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return min(60.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+
+class AsyncVerificationEngine:
+    def __init__(self, concurrency=8, requests_per_minute=VERIFIER_RPM, tokens_per_minute=VERIFIER_TPM,
+                 max_retries=VERIFIER_MAX_RETRIES, model=MODEL, client=None):
+        # base_url and api_key come from OPENAI_BASE_URL / OPENAI_API_KEY, so a
+        # local OpenAI-compatible server can stand in for the real API
+        self.client = client or openai.AsyncOpenAI(max_retries=0)
+        self.model = model
+        self.max_retries = max_retries
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.retries = 0
+
+    async def chat(self, messages, completion_tokens=5, kind="verify", **request_kwargs):
+        estimated = estimate_tokens(messages, completion_tokens)
+        attempt = 0
+        while True:
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimated)
+            started = time.perf_counter()
+            try:
+                async with self.semaphore:
+                    ai_response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=0,
+                        **request_kwargs,
+                    )
+            except Exception as e:
+                METRICS.record_openai_call(kind, time.perf_counter() - started, error=e)
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = _retry_delay(e, attempt)
+                attempt += 1
+                self.retries += 1
+                print(f"Retrying OpenAI call in {delay:.1f}s (attempt {attempt}/{self.max_retries}): {e}")
+                await asyncio.sleep(delay)
+                continue
+            METRICS.record_openai_call(kind, time.perf_counter() - started, ai_response.usage)
+            if ai_response.usage is not None:
+                self.token_bucket.settle(ai_response.usage.total_tokens - estimated)
+            return ai_response.choices[0].message.content.strip()
+
+    async def verify_tweet(self, tweet):
+        content = tweet.get("content", "")
+        try:
+            verification_result = await self.chat(build_verification_messages(content, tweet.get("tweet_url", "")))
+        except Exception as e:
+            print(f"Error with OpenAI API: {e}")
+            verification_result = API_ERROR_RESULT
+        if not verification_result.lower().startswith("yes"):
+            return verification_result, 0
+        try:
+            fire_related_score = parse_fire_related_score(await self.chat(build_score_messages(content), kind="score"))
+        except Exception as e:
+            print(f"Error with OpenAI API (score): {e}")
+            fire_related_score = ""
+        return verification_result, fire_related_score
+
+    async def verify_batch(self, tweets):
+        contents = [tweet.get("content", "") for tweet in tweets]
+        try:
+            answer = await self.chat(
+                build_combined_messages(contents),
+                completion_tokens=25 * len(contents),
+                kind="combined",
+                response_format={"type": "json_object"},
+            )
+        except Exception as e:
+            print(f"Error with OpenAI API (combined): {e}")
+            answer = ""
+        results = parse_combined_response(answer, len(contents))
+        if len(contents) > 1:
+            missing = [i for i, result in enumerate(results) if result is None]
+            retried = await asyncio.gather(*(self.verify_batch([tweets[i]]) for i in missing))
+            for i, single in zip(missing, retried):
+                results[i] = single[0]
+        return [result or (API_ERROR_RESULT, 0) for result in results]
+
+    async def close(self):
+        await self.client.close()
+
+def iter_verified_concurrently(tweets, concurrency=8, window=None, mode="two_call", batch_size=1, **engine_kwargs):
+    # Yields (tweet, verification_result, fire_related_score) in input order.
+    # The engine runs on a private event loop thread; at most `window` requests
+    # are in flight, so `tweets` may be a lazy or unbounded iterable.
+    window = window or concurrency * 4
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="async-verifier", daemon=True)
+    thread.start()
+
+    async def create_engine():
+        return AsyncVerificationEngine(concurrency=concurrency, **engine_kwargs)
+
+    engine = asyncio.run_coroutine_threadsafe(create_engine(), loop).result()
+    if mode == "combined":
+        requests = ((batch, engine.verify_batch(batch)) for batch in iter_batches(tweets, batch_size))
+    else:
+        requests = (([tweet], _as_list(engine.verify_tweet(tweet))) for tweet in tweets)
+    pending = deque()
+
+    def drain_one():
+        batch, future = pending.popleft()
+        for tweet, (verification_result, fire_related_score) in zip(batch, future.result()):
+            yield tweet, verification_result, fire_related_score
+
+    try:
+        for batch, coroutine in requests:
+            pending.append((batch, asyncio.run_coroutine_threadsafe(coroutine, loop)))
+            if len(pending) >= window:
+                yield from drain_one()
+        while pending:
+            yield from drain_one()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        asyncio.run_coroutine_threadsafe(engine.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+async def _as_list(coroutine):
+    return [await coroutine]
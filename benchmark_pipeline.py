@@ -0,0 +1,378 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import threading
+import contextlib
+from html import escape
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from prompt_builder import clean_content, SCORE_INSTRUCTIONS
+
+# Offline end-to-end benchmark. A local HTTP server stands in for Twitter
+# search pages (built from a raw tweets file) and another for the OpenAI chat
+# API (answering with the verdicts stored in live_verified_fires.json after a
+# configurable delay). Each pipeline stage runs in a scratch directory and is
+# timed for throughput, per-item p50/p95 latency and peak resident memory.
+#
+#   python benchmark_pipeline.py [10000,100000,1000000] [api_latency_seconds]
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_SOURCE = os.path.join(REPO_DIR, "25jul_tweets_raw.json")
+BENCH_VERDICTS = os.path.join(REPO_DIR, "output", "live_verified_fires.json")
+BENCH_OUTPUT_DIR = os.path.join(REPO_DIR, "output", "benchmarks")
+DEFAULT_SCALES = [10000, 100000, 1000000]
+BENCH_API_LATENCY = float(os.getenv("BENCH_API_LATENCY", "0.05"))
+# Verify, Excel and scrape run on a sample: at API latency 1M tweets would take
+# hours, and the workbook is rewritten on every flush
+BENCH_VERIFY_LIMIT = int(os.getenv("BENCH_VERIFY_LIMIT", "500"))
+BENCH_EXCEL_ROWS = int(os.getenv("BENCH_EXCEL_ROWS", "1000"))
+BENCH_SCRAPE_QUERIES = int(os.getenv("BENCH_SCRAPE_QUERIES", "10"))
+TWEETS_PER_PAGE = 40
+# Synthetic ages spread over this many hours, so part of every run is older than 72h
+MAX_AGE_HOURS = 96
+
+def load_source_tweets(path=BENCH_SOURCE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def synthetic_tweet(source, i, now):
+    base = source[i % len(source)]
+    age = timedelta(hours=random.Random(i).uniform(0, MAX_AGE_HOURS))
+    username = base.get("username") or "bench"
+    # " #<i>" makes every copy unique to the raw store; the fake API strips it
+    return dict(
+        base,
+        content=f"{base.get('content', '')} #{i}",
+        timestamp=(now - age).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        tweet_url=f"https://x.com/{username.lstrip('@')}/status/{10 ** 17 + i}",
+        search_query=f"bench query {i // TWEETS_PER_PAGE}",
+    )
+
+def base_content(content):
+    return content.rsplit(" #", 1)[0]
+
+# --- Twitter stand-in -------------------------------------------------------
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><style>article {{ display: block; min-height: 300px; }}</style></head>
+<body><main id="timeline">{articles}</main>
+<script>
+var pending = {pending};
+window.addEventListener("scroll", function () {{
+    var timeline = document.getElementById("timeline");
+    pending.splice(0, 10).forEach(function (html) {{ timeline.insertAdjacentHTML("beforeend", html); }});
+}});
+</script></body></html>"""
+
+def render_article(tweet):
+    path = urlparse(tweet["tweet_url"]).path
+    return (
+        '<article role="article">'
+        f'<div dir="ltr"><span>{escape(tweet.get("username", ""))}</span></div>'
+        f'<div lang="en">{escape(tweet.get("content", ""))}</div>'
+        f'<a href="{path}"><time datetime="{tweet["timestamp"]}">{tweet["timestamp"]}</time></a>'
+        f'<div data-testid="retweet">{escape(str(tweet.get("retweets", "0")))}</div>'
+        f'<div data-testid="like">{escape(str(tweet.get("likes", "0")))}</div>'
+        "</article>"
+    )
+
+def make_twitter_handler(source, now):
+    class TwitterStandIn(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/search":
+                self.send_response(404)
+                self.end_headers()
+                return
+            # "bench query <k>" serves synthetic tweets k*TWEETS_PER_PAGE onwards
+            query = parse_qs(url.query).get("q", [""])[0]
+            page = int(query.rsplit(" ", 1)[-1]) if query.rsplit(" ", 1)[-1].isdigit() else 0
+            articles = [render_article(synthetic_tweet(source, page * TWEETS_PER_PAGE + i, now)) for i in range(TWEETS_PER_PAGE)]
+            body = SEARCH_PAGE.format(articles="".join(articles[:10]), pending=json.dumps(articles[10:])).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    return TwitterStandIn
+
+# --- OpenAI stand-in --------------------------------------------------------
+
+def load_stored_verdicts(path=BENCH_VERDICTS):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    # Keyed the way the content appears in prompts (prompt_builder.clean_content)
+    return {clean_content(row["content"]): row.get("fire_related_score") or 7 for row in rows}
+
+def _between(text, start, end=None):
+    begin = text.find(start)
+    if begin < 0:
+        return ""
+    begin += len(start)
+    stop = text.find(end, begin) if end else -1
+    return text[begin:stop] if stop >= 0 else text[begin:]
+
+def make_openai_handler(verdicts, latency):
+    class OpenAIStandIn(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            system = body["messages"][0]["content"]
+            user = body["messages"][-1]["content"]
+            if body.get("response_format"):
+                items = json.loads(_between(user, "Tweets: "))
+                results = []
+                for item in items:
+                    score = verdicts.get(base_content(item["content"]))
+                    results.append({"id": item["id"], "verdict": "yes" if score else "no", "score": score or 0})
+                answer = json.dumps({"results": results})
+            elif system == SCORE_INSTRUCTIONS:
+                answer = str(verdicts.get(base_content(_between(user, "Tweet content: ")), 0))
+            else:
+                answer = "yes" if base_content(_between(user, "Content: ")) in verdicts else "no"
+            data = json.dumps({
+                "id": "bench", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(user) // 4, "completion_tokens": len(answer) // 4 + 1, "total_tokens": len(user) // 4 + len(answer) // 4 + 1},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+    return OpenAIStandIn
+
+def start_server(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# --- Measurement ------------------------------------------------------------
+
+class PeakRSS:
+    # Samples resident memory from /proc on a side thread; unlike tracemalloc
+    # this adds no overhead to the stage being timed. Linux only, None elsewhere.
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.available = os.path.exists("/proc/self/statm")
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if self.available else 0
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _rss(self):
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * self.page_size
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.available:
+            self.peak = self._rss()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.available:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self._rss())
+
+    def peak_mb(self):
+        return round(self.peak / 2 ** 20, 1) if self.available else None
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def timed_iter(iterable, samples):
+    # Records the gap between consecutive items: per-item latency as the consumer sees it
+    last = time.perf_counter()
+    for item in iterable:
+        now = time.perf_counter()
+        samples.append(now - last)
+        last = now
+        yield item
+
+@contextlib.contextmanager
+def measure_stage(results, stage, scale):
+    record = {"stage": stage, "scale": scale, "items": 0, "samples": []}
+    memory = PeakRSS()
+    started = time.perf_counter()
+    try:
+        with memory:
+            yield record
+    finally:
+        seconds = time.perf_counter() - started
+        samples = record.pop("samples")
+        record["seconds"] = round(seconds, 3)
+        record["tweets_per_sec"] = round(record["items"] / seconds, 1) if seconds and record["items"] else None
+        record["p50_ms"] = round(percentile(samples, 0.50) * 1000, 3) if samples else None
+        record["p95_ms"] = round(percentile(samples, 0.95) * 1000, 3) if samples else None
+        record["peak_rss_mb"] = memory.peak_mb()
+        results.append(record)
+        print(format_row(record), flush=True)
+
+def format_row(record):
+    def cell(value, width, digits=1):
+        return f"{value:>{width}.{digits}f}" if isinstance(value, (int, float)) else f"{'-':>{width}}"
+    return (f"{record['stage']:<12} {record['scale']:>9} {record['items']:>9} {cell(record['seconds'], 9, 2)} "
+            f"{cell(record['tweets_per_sec'], 11)} {cell(record['p50_ms'], 9, 3)} {cell(record['p95_ms'], 9, 3)} "
+            f"{cell(record['peak_rss_mb'], 8)}" + (f"  {record['note']}" if record.get("note") else ""))
+
+# --- Stages -----------------------------------------------------------------
+
+def bench_save(t, source, scale, now, results):
+    with measure_stage(results, "save_tweet", scale) as record:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for i in range(scale):
+                tweet = synthetic_tweet(source, i, now)
+                started = time.perf_counter()
+                t.save_tweet(tweet)
+                record["samples"].append(time.perf_counter() - started)
+                record["items"] += 1
+    t.get_raw_store().close()
+    t._raw_store = None
+
+def bench_filter(t, scale, results):
+    with measure_stage(results, "filter_72h", scale) as record:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            stats = t.filter_tweets_last_72_hours(t.OUTPUT_RAW_STORE, "cleaned.json")
+        record["items"] = stats["read"]
+        record["note"] = f"{stats['accepted']} kept"
+
+def bench_verify(source, scale, now, results):
+    import ai_fire_verifier
+    from tweet_filter import classify_tweet
+    sample = []
+    for i in range(scale):
+        tweet = synthetic_tweet(source, i, now)
+        if classify_tweet(tweet, now=now) == "accepted":
+            sample.append(tweet)
+            if len(sample) >= BENCH_VERIFY_LIMIT:
+                break
+    with open("verify_sample.json", "w", encoding="utf-8") as f:
+        json.dump(sample, f, ensure_ascii=False)
+    original = ai_fire_verifier.iter_verified
+    with measure_stage(results, "verify", scale) as record:
+        ai_fire_verifier.iter_verified = lambda *args, **kwargs: timed_iter(original(*args, **kwargs), record["samples"])
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+                ai_fire_verifier.verify_and_save_to_excel("verify_sample.json", f"output/verify_bench_{scale}.xlsx", f"output/verify_bench_{scale}.json")
+        finally:
+            ai_fire_verifier.iter_verified = original
+        record["items"] = len(sample)
+        with open(f"output/verify_bench_{scale}.json", "r", encoding="utf-8") as f:
+            record["note"] = f"{len(json.load(f))} yes, sample of {len(sample)}"
+
+def bench_excel(source, scale, now, results):
+    from excel_sink import ExcelSink
+    rows = min(scale, BENCH_EXCEL_ROWS)
+    sink = ExcelSink(f"output/excel_bench_{scale}.xlsx")
+    with measure_stage(results, "excel_sink", scale) as record:
+        for i in range(rows):
+            tweet = synthetic_tweet(source, i, now)
+            row = {
+                "title": tweet["content"][:100], "content": tweet["content"], "published_date": tweet["timestamp"],
+                "url": tweet["tweet_url"], "source": tweet.get("username", ""), "fire_related_score": 7,
+                "verification_result": "yes", "verified_at": now.isoformat(),
+            }
+            started = time.perf_counter()
+            sink.append(row)
+            record["samples"].append(time.perf_counter() - started)
+            record["items"] += 1
+        sink.close()
+        record["note"] = f"{sink.flushes} flushes"
+
+def bench_scrape(t, scale, results):
+    with measure_stage(results, "scrape", scale) as record:
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                driver = t.setup_driver()
+        except Exception as e:
+            record["note"] = f"skipped: no Chrome/chromedriver ({str(e).splitlines()[0][:60]})"
+            return
+        try:
+            pages = min(BENCH_SCRAPE_QUERIES, max(1, scale // TWEETS_PER_PAGE))
+            for page in range(pages):
+                collected = []
+                stats = t.scrape_recent_tweets_for_query(driver, f"bench query {page}", max_tweets=TWEETS_PER_PAGE, scroll_times=6, save=collected.append)
+                record["samples"].append(stats["elapsed"])
+                record["items"] += len(collected)
+            record["note"] = f"{pages} page loads"
+        finally:
+            driver.quit()
+
+def run_benchmark(scales, latency=BENCH_API_LATENCY):
+    source = load_source_tweets()
+    now = datetime.now(timezone.utc)
+    twitter, twitter_url = start_server(make_twitter_handler(source, now))
+    openai_server, openai_url = start_server(make_openai_handler(load_stored_verdicts(), latency))
+    # Before the pipeline modules are imported: they read these at import time
+    os.environ["TWITTER_BASE_URL"] = twitter_url
+    os.environ["OPENAI_BASE_URL"] = f"{openai_url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-bench-offline-0000"
+    os.environ["VERIFIER_SEND_EMAIL"] = "0"
+    os.environ["CRAWL_INCREMENTAL"] = "0"
+    os.environ.setdefault("VERIFICATION_CACHE", "0")
+    os.environ.setdefault("PRECLASSIFIER", "0")
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    # Every relative output/ path the stages write lands in the scratch dir
+    os.chdir(workdir)
+    os.makedirs("output", exist_ok=True)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import tweet_fire_search as t
+    t.set_log_file(os.path.join(workdir, "bench.log"))
+    t.METRICS.events.set_path(os.path.join(workdir, "output", "metrics", "events.jsonl"))
+    results = []
+    print(f"Twitter stand-in {twitter_url} | OpenAI stand-in {openai_url} (latency {latency}s) | scratch {workdir}")
+    print(f"{'stage':<12} {'scale':>9} {'items':>9} {'seconds':>9} {'tweets/sec':>11} {'p50 ms':>9} {'p95 ms':>9} {'peak RSS':>8}")
+    try:
+        for scale in scales:
+            t.OUTPUT_RAW_STORE = os.path.join(workdir, f"raw_{scale}.jsonl")
+            t.OUTPUT_RAW_FILE = os.path.join(workdir, f"raw_{scale}.json")
+            t._raw_store = None
+            bench_save(t, source, scale, now, results)
+            bench_filter(t, scale, results)
+            bench_verify(source, scale, now, results)
+            bench_excel(source, scale, now, results)
+            bench_scrape(t, scale, results)
+    finally:
+        # Flushes what the scratch dir should hold; later lines are dropped
+        t.set_log_file(os.devnull)
+        t.METRICS.events.set_path(os.devnull)
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+        twitter.shutdown()
+        openai_server.shutdown()
+    os.makedirs(BENCH_OUTPUT_DIR, exist_ok=True)
+    report_path = os.path.join(BENCH_OUTPUT_DIR, f"bench_{datetime.now().strftime('%d%b_%H%M').lower()}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"api_latency": latency, "verify_limit": BENCH_VERIFY_LIMIT, "results": results}, f, indent=2)
+    print(f"Saved results to {report_path}")
+    return results
+
+if __name__ == "__main__":
+    scales = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else DEFAULT_SCALES
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else BENCH_API_LATENCY
+    run_benchmark(scales, latency)
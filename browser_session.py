@@ -0,0 +1,126 @@
+import os
+import json
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from live_journal import FileLock
+
+# Faster Chrome startup for the crawler: the chromedriver path is resolved
+# once and reused, the logged-in session is restored from saved cookies (or
+# a persistent profile) instead of a full login, and an optional lightweight
+# profile keeps images, fonts and video off the wire.
+
+# Explicit chromedriver binary; otherwise the path webdriver_manager resolved
+# last time is reused while it still exists
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")
+DRIVER_PATH_CACHE = "output/chromedriver_path.txt"
+SESSION_COOKIES_PATH = os.getenv("TWITTER_COOKIES_PATH", "output/twitter_cookies.json")
+# Persistent Chrome user-data directory (one subdirectory per crawl worker);
+# empty uses a throwaway profile plus the saved cookies
+CHROME_PROFILE_DIR = os.getenv("CHROME_PROFILE_DIR", "")
+CHROME_LIGHTWEIGHT = os.getenv("CHROME_LIGHTWEIGHT", "0") == "1"
+SESSION_CHECK_TIMEOUT = 10
+# Fonts and video are requested by URL; images are turned off by content setting
+# below, which still leaves their src attributes in the DOM for the media field
+BLOCKED_URL_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.m3u8", "*.m4s", "*video.twimg.com*"]
+
+def cached_chromedriver_path():
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    if os.path.exists(DRIVER_PATH_CACHE):
+        with open(DRIVER_PATH_CACHE, "r", encoding="utf-8") as f:
+            path = f.read().strip()
+        if path and os.path.exists(path):
+            return path
+    # Only this step needs the network, and only when the cached binary is gone
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(DRIVER_PATH_CACHE), exist_ok=True)
+    with open(DRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+        f.write(path)
+    return path
+
+def apply_profile_options(chrome_options, worker_id=0):
+    if CHROME_PROFILE_DIR:
+        # Chrome locks a user-data dir, so parallel workers each get their own
+        profile_dir = os.path.abspath(os.path.join(CHROME_PROFILE_DIR, f"worker-{worker_id}"))
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    if CHROME_LIGHTWEIGHT:
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+        chrome_options.add_argument("--disable-remote-fonts")
+
+def block_heavy_requests(driver):
+    if not CHROME_LIGHTWEIGHT:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except WebDriverException as e:
+        print(f"⚠️ Could not block fonts/video requests: {e}")
+
+def save_session_cookies(driver, path=SESSION_COOKIES_PATH):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    cookies = driver.get_cookies()
+    # Parallel crawl workers log in at about the same time; the lock keeps
+    # them from writing or swapping in the shared temp file at once
+    with FileLock(path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cookies, f)
+        os.replace(tmp_path, path)
+
+def load_session_cookies(driver, path=SESSION_COOKIES_PATH):
+    if not os.path.exists(path):
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            cookies = json.load(f)
+        except json.JSONDecodeError:
+            return False
+    now = time.time()
+    cdp_cookies = []
+    for cookie in cookies:
+        if cookie.get("expiry") and cookie["expiry"] < now:
+            continue
+        entry = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite") if key in cookie}
+        if cookie.get("expiry"):
+            entry["expires"] = cookie["expiry"]
+        cdp_cookies.append(entry)
+    if not cdp_cookies:
+        return False
+    # Set through CDP so no page has to load on the cookie domain first
+    driver.execute_cdp_cmd("Network.setCookies", {"cookies": cdp_cookies})
+    return True
+
+def session_is_valid(driver, home_url, timeout=SESSION_CHECK_TIMEOUT):
+    # The home timeline renders for a live session; otherwise x.com redirects to the login flow
+    driver.get(home_url)
+
+    def settled(d):
+        url = d.current_url
+        if "/login" in url or "/i/flow/" in url:
+            return "login"
+        if d.find_elements(By.CSS_SELECTOR, "[data-testid='primaryColumn']") and "/home" in url:
+            return "home"
+        return False
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.25).until(settled) == "home"
+    except TimeoutException:
+        return False
+
+def wait_for_login(driver, timeout=20):
+    # Logged in once the auth_token cookie is set, instead of a fixed sleep
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(
+            lambda d: d.get_cookie("auth_token") is not None
+        )
+        return True
+    except TimeoutException:
+        return False
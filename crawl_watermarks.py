@@ -0,0 +1,109 @@
+import os
+import re
+import sys
+import json
+import threading
+from datetime import datetime, timezone
+from tweet_filter import parse_tweet_time
+
+# Per-query high-watermarks for incremental crawling. Live search lists tweets
+# newest first, so once a scrape reaches the newest tweet stored for a query
+# on an earlier run, everything below it has been seen already.
+
+WATERMARK_PATH = os.getenv("CRAWL_WATERMARK_PATH", "output/crawl_watermarks.json")
+# Seen tweets in a row needed to stop; a lone old tweet (an ad, a reply
+# surfaced out of order) should not end the scrape early
+WATERMARK_OVERLAP = int(os.getenv("CRAWL_WATERMARK_OVERLAP", "2"))
+STATUS_ID_RE = re.compile(r"/status/(\d+)")
+
+def tweet_mark(tweet):
+    # Snowflake IDs grow with time, so the ID orders tweets; the timestamp is
+    # the fallback when no ID can be read (DOM rows without a status link)
+    tweet_id = str(tweet.get("tweet_id") or "")
+    if not tweet_id.isdigit():
+        match = STATUS_ID_RE.search(tweet.get("tweet_url") or "")
+        tweet_id = match.group(1) if match else ""
+    return {"tweet_id": tweet_id, "timestamp": tweet.get("timestamp") or ""}
+
+def is_newer(mark, other):
+    # True if `mark` is strictly newer than `other`
+    if other is None:
+        return True
+    if mark["tweet_id"] and other.get("tweet_id"):
+        return int(mark["tweet_id"]) > int(other["tweet_id"])
+    mark_time = parse_tweet_time(mark["timestamp"])
+    other_time = parse_tweet_time(other.get("timestamp"))
+    if mark_time is None or other_time is None:
+        return mark_time is not None
+    return mark_time > other_time
+
+def is_seen(tweet, watermark):
+    if watermark is None:
+        return False
+    mark = tweet_mark(tweet)
+    if mark["tweet_id"] and watermark.get("tweet_id"):
+        return int(mark["tweet_id"]) <= int(watermark["tweet_id"])
+    # Timestamps have one-second resolution: a tie may be a different tweet,
+    # so only strictly older tweets count as seen
+    tweet_time = parse_tweet_time(mark["timestamp"])
+    mark_time = parse_tweet_time(watermark.get("timestamp"))
+    return tweet_time is not None and mark_time is not None and tweet_time < mark_time
+
+class CrawlWatermarks:
+    def __init__(self, path=WATERMARK_PATH):
+        self.path = path
+        self.marks = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    self.marks = json.load(f)
+                except json.JSONDecodeError:
+                    self.marks = {}
+
+    def get(self, query):
+        with self._lock:
+            return self.marks.get(query)
+
+    def advance(self, query, mark):
+        # Only ever moves forward; saved right away so a crash keeps earlier queries
+        if not mark:
+            return False
+        with self._lock:
+            if not is_newer(mark, self.marks.get(query)):
+                return False
+            self.marks[query] = dict(mark, updated=datetime.now(timezone.utc).isoformat())
+            self._save()
+        return True
+
+    def reset(self, query=None):
+        with self._lock:
+            if query is None:
+                self.marks = {}
+            else:
+                self.marks.pop(query, None)
+            self._save()
+
+    def _save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.marks, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in ("show", "reset"):
+        print("Usage: python crawl_watermarks.py show")
+        print("       python crawl_watermarks.py reset [query]   (next crawl of the query scrolls from the top)")
+        exit(1)
+    watermarks = CrawlWatermarks()
+    if command == "show":
+        for query, mark in sorted(watermarks.marks.items()):
+            print(f"{mark.get('timestamp', ''):26} {mark.get('tweet_id', ''):20} {query}")
+        print(f"{len(watermarks.marks)} queries with a watermark in {watermarks.path}")
+    else:
+        query = sys.argv[2] if len(sys.argv) > 2 else None
+        watermarks.reset(query)
+        print(f"Reset watermark for {query!r}" if query else f"Reset all watermarks in {watermarks.path}")
@@ -0,0 +1,114 @@
+import os
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment
+from openpyxl.utils import get_column_letter
+from run_metrics import METRICS
+
+# Buffered Excel output for the verifiers. Rows are kept in memory and the
+# workbook is regenerated in openpyxl write-only (streaming) mode, with
+# formatting applied as each cell is written. Each rewrite costs the whole
+# workbook, so the gap between flushes grows with it (at least `flush_every`
+# rows, else EXCEL_FLUSH_GROWTH times the rows already written), up to
+# EXCEL_FLUSH_MAX rows. A crash loses at most that many rows; the verifiers'
+# fsync'd journals still have them (restore_missing_excel_rows puts them back).
+
+EXCEL_FLUSH_EVERY = int(os.getenv("EXCEL_FLUSH_EVERY", "25"))
+EXCEL_FLUSH_GROWTH = float(os.getenv("EXCEL_FLUSH_GROWTH", "0.5"))
+EXCEL_FLUSH_MAX = int(os.getenv("EXCEL_FLUSH_MAX", "500"))
+
+def estimate_row_height(values):
+    max_height = 15
+    for value in values:
+        if value:
+            lines = str(value).count("\n") + 1
+            length = len(str(value))
+            max_height = max(max_height, min(150, lines * 15 + length // 50 * 15))
+    return max_height
+
+class ExcelSink:
+    # style="wrap": fixed 30-wide wrapped columns, row heights from content and
+    # clickable url cells (ai_fire_verifier). style="autofit": text-formatted
+    # cells with widths fitted to the longest value (ai_fire_verifier_72h).
+    def __init__(self, excel_path, flush_every=EXCEL_FLUSH_EVERY, style="wrap", column_width=30):
+        self.excel_path = excel_path
+        self.flush_every = max(1, flush_every)
+        self.style = style
+        self.column_width = column_width
+        self.columns = []
+        self.rows = []
+        self._unflushed = 0
+        self.flushes = 0
+        if os.path.exists(excel_path):
+            self._load_existing()
+
+    def _load_existing(self):
+        # Keep appending to a workbook left by an earlier run, read once
+        wb = load_workbook(self.excel_path, read_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header:
+            self.columns = [str(c) for c in header if c is not None]
+            for values in rows:
+                self.rows.append(dict(zip(self.columns, values)))
+        wb.close()
+
+    def append(self, row):
+        for key in row:
+            if key not in self.columns:
+                self.columns.append(key)
+        self.rows.append(row)
+        self._unflushed += 1
+        gap = min(EXCEL_FLUSH_MAX, max(self.flush_every, (len(self.rows) - self._unflushed) * EXCEL_FLUSH_GROWTH))
+        if self._unflushed >= gap:
+            self.flush()
+
+    def _column_widths(self):
+        if self.style != "autofit":
+            return [self.column_width] * len(self.columns)
+        widths = []
+        for column in self.columns:
+            longest = max([len(column)] + [len(str(row.get(column))) for row in self.rows if row.get(column) is not None])
+            widths.append((longest + 2) * 1.2)
+        return widths
+
+    def _cell(self, ws, value, is_url=False):
+        cell = WriteOnlyCell(ws, value=value)
+        if self.style == "autofit":
+            cell.number_format = "@"
+        elif is_url and value and str(value).startswith("http"):
+            cell.hyperlink = value
+            cell.style = "Hyperlink"
+        else:
+            cell.alignment = Alignment(wrap_text=True)
+        return cell
+
+    def flush(self):
+        if not self.rows:
+            return
+        with METRICS.timer("excel.flush", rows=len(self.rows)):
+            self._write_workbook()
+        self._unflushed = 0
+        self.flushes += 1
+
+    def _write_workbook(self):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for idx, width in enumerate(self._column_widths(), 1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+        url_columns = {i for i, column in enumerate(self.columns) if column.lower() == "url"}
+        ws.row_dimensions[1].height = estimate_row_height(self.columns)
+        ws.append([self._cell(ws, column) for column in self.columns])
+        for row_idx, row in enumerate(self.rows, 2):
+            values = [row.get(column) for column in self.columns]
+            if self.style != "autofit":
+                ws.row_dimensions[row_idx].height = estimate_row_height(values)
+            ws.append([self._cell(ws, value, i in url_columns) for i, value in enumerate(values)])
+        # Write beside the target and swap in, so a crash never leaves a torn workbook
+        tmp_path = self.excel_path + ".tmp.xlsx"
+        wb.save(tmp_path)
+        os.replace(tmp_path, self.excel_path)
+
+    def close(self):
+        if self._unflushed:
+            self.flush()
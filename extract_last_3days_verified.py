@@ -1,44 +1,55 @@
-import json
+import sys
+import glob
 from datetime import datetime, timedelta, timezone
-import pandas as pd
+from incident_store import IncidentStore, parse_published, export_incidents
+from live_journal import compact
 
-INPUT_PATH = 'output/live_verified_fires.json'
 OUTPUT_JSON_PATH = 'output/final_verified_fires.json'
 OUTPUT_XLSX_PATH = 'output/final_verified_fires.xlsx'
+# Live files written before the verifiers fed the incident store; each is
+# re-read only when it changed since its last import
+LEGACY_INPUT_GLOB = 'output/live_verified_fires*.json'
+LEGACY_JOURNAL_GLOB = 'output/live_verified_fires*.jsonl'
 
-# Load the data
-with open(INPUT_PATH, 'r', encoding='utf-8') as f:
-    data = json.load(f)
+# Usage: python extract_last_3days_verified.py [hours] [--state Texas] [--since ISO --until ISO]
+args = sys.argv[1:]
+options = {}
+for flag in ("--state", "--since", "--until"):
+    if flag in args:
+        i = args.index(flag)
+        options[flag] = args[i + 1]
+        del args[i:i + 2]
+hours = float(args[0]) if args else 72
+
+# Fold in rows verifiers have journaled since their last compaction
+for journal in sorted(glob.glob(LEGACY_JOURNAL_GLOB)):
+    compact(journal)
+
+store = IncidentStore()
+for path in sorted(glob.glob(LEGACY_INPUT_GLOB)):
+    added = store.import_json(path)
+    if added:
+        print(f"Imported {added} incidents from {path}")
 
 # Get current UTC time (timezone-aware)
 now = datetime.now(timezone.utc)
 print(f"Current UTC time: {now.isoformat()}\n")
 
-# Filter entries from the last 72 hours
-filtered = []
-for i, entry in enumerate(data):
-    ts = entry.get('published_date', '')
-    try:
-        tweet_time = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-        diff_hours = (now - tweet_time).total_seconds() / 3600
-        include = (now - tweet_time).total_seconds() <= 72 * 3600
-        print(f"[{i}] published_date: {ts} | parsed: {tweet_time.isoformat()} | diff_hours: {diff_hours:.2f} | included: {include}")
-        if include:
-            filtered.append(entry)
-    except Exception as e:
-        print(f"[{i}] published_date: {ts} | ERROR: {e}")
-        continue
-
-# Save the filtered entries as JSON
-with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
-    json.dump(filtered, f, indent=2, ensure_ascii=False)
-
-print(f"\nExtracted {len(filtered)} entries from the last 3 days to {OUTPUT_JSON_PATH}")
+if "--since" in options or "--until" in options:
+    since = parse_published(options["--since"]) if "--since" in options else None
+    until = parse_published(options["--until"]) if "--until" in options else None
+    window = f"{options.get('--since', 'start')} to {options.get('--until', 'now')}"
+else:
+    since, until = now - timedelta(hours=hours), None
+    window = f"the last {hours:g} hours"
+state = options.get("--state")
+partitions = store.partitions(since, until, state)
+filtered = list(store.query(since, until, state))
+print(f"Read {len(partitions)} of {len(store.manifest['partitions'])} {store.granularity} partitions for {window}" + (f" in {state}" if state else ""))
 
-# Save the filtered entries as Excel
+export_incidents(filtered, OUTPUT_JSON_PATH, OUTPUT_XLSX_PATH)
+print(f"\nExtracted {len(filtered)} entries from {window} to {OUTPUT_JSON_PATH}")
 if filtered:
-    df = pd.DataFrame(filtered)
-    df.to_excel(OUTPUT_XLSX_PATH, index=False)
     print(f"Also saved {len(filtered)} entries to {OUTPUT_XLSX_PATH}")
 else:
-    print("No entries to save to Excel.") 
\ No newline at end of file
+    print("No entries to save to Excel.")
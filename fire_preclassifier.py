@@ -0,0 +1,214 @@
+import os
+import re
+import sys
+import json
+import glob
+import math
+import zlib
+import random
+from keyword_matcher import match_tweet, is_relevant_match
+from verification_cache import normalize_content
+
+# CPU-only hashed-feature logistic regression that answers confident tweets
+# locally so only uncertain ones are sent to the LLM.
+
+MODEL_PATH = os.getenv("PRECLASSIFIER_MODEL", "output/preclassifier_model.json")
+# Past verdicts of every tweet sent to the LLM, appended by the verifier
+LLM_VERDICTS_PATH = "output/llm_verdicts.jsonl"
+# At or below REJECT the tweet is answered "no", at or above ACCEPT "yes"
+REJECT_THRESHOLD = float(os.getenv("PRECLASSIFIER_REJECT", "0.05"))
+ACCEPT_THRESHOLD = float(os.getenv("PRECLASSIFIER_ACCEPT", "0.98"))
+HASH_BITS = 18
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+def extract_features(content):
+    text = normalize_content(content)
+    tokens = TOKEN_RE.findall(text)
+    features = [f"w:{t}" for t in tokens]
+    features += [f"b:{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+    found = match_tweet(text)
+    fire_hits = found["fire"]
+    damage_hits = found["damage"]
+    location_hits = found["state"] + found["city"]
+    features += [f"fire_kw:{kw}" for kw in fire_hits]
+    features += [f"damage_kw:{kw}" for kw in damage_hits]
+    features += [f"location:{loc}" for loc in location_hits]
+    features.append(f"fire_kw_count:{min(len(fire_hits), 3)}")
+    features.append(f"has_damage:{bool(damage_hits)}")
+    features.append(f"has_location:{bool(location_hits)}")
+    # Same rule as ai_fire_verifier_72h.is_relevant_tweet
+    features.append(f"relevant:{is_relevant_match(found)}")
+    features.append(f"length:{min(len(text) // 80, 4)}")
+    return features
+
+def hash_features(features, bits=HASH_BITS):
+    mask = (1 << bits) - 1
+    indices = {}
+    for feature in features:
+        index = zlib.crc32(feature.encode("utf-8")) & mask
+        indices[index] = indices.get(index, 0) + 1.0
+    # L2-normalize so long tweets do not dominate the dot product
+    norm = math.sqrt(sum(v * v for v in indices.values())) or 1.0
+    return {i: v / norm for i, v in indices.items()}
+
+def _sigmoid(z):
+    if z < -35:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+class FirePreclassifier:
+    def __init__(self, weights=None, bias=0.0, bits=HASH_BITS, reject_threshold=REJECT_THRESHOLD, accept_threshold=ACCEPT_THRESHOLD):
+        self.weights = weights or {}
+        self.bias = bias
+        self.bits = bits
+        self.reject_threshold = reject_threshold
+        self.accept_threshold = accept_threshold
+        self.decided = {"yes": 0, "no": 0, "uncertain": 0}
+
+    def probability(self, content):
+        x = hash_features(extract_features(content), self.bits)
+        return _sigmoid(self.bias + sum(self.weights.get(i, 0.0) * v for i, v in x.items()))
+
+    def decide(self, tweet):
+        # Returns (verification_result, score) for confident tweets, None otherwise
+        p = self.probability(tweet.get("content", ""))
+        if p <= self.reject_threshold:
+            self.decided["no"] += 1
+            return "no (pre-classifier)", 0
+        if p >= self.accept_threshold:
+            self.decided["yes"] += 1
+            return "yes (pre-classifier)", round(10 * p)
+        self.decided["uncertain"] += 1
+        return None
+
+    def fit(self, samples, epochs=20, learning_rate=0.5, l2=1e-5, seed=13):
+        vectors = [(hash_features(extract_features(content), self.bits), label) for content, label in samples]
+        positives = sum(label for _, label in vectors) or 1
+        negatives = (len(vectors) - positives) or 1
+        # Balance classes: past verdicts are mostly one-sided
+        class_weight = {1: len(vectors) / (2.0 * positives), 0: len(vectors) / (2.0 * negatives)}
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(vectors)
+            rate = learning_rate / (1 + epoch)
+            for x, label in vectors:
+                p = _sigmoid(self.bias + sum(self.weights.get(i, 0.0) * v for i, v in x.items()))
+                gradient = (p - label) * class_weight[label]
+                self.bias -= rate * gradient
+                for i, v in x.items():
+                    w = self.weights.get(i, 0.0)
+                    self.weights[i] = w - rate * (gradient * v + l2 * w)
+        self.weights = {i: w for i, w in self.weights.items() if abs(w) > 1e-6}
+        return self
+
+    def report(self):
+        total = sum(self.decided.values())
+        if total:
+            avoided = self.decided["yes"] + self.decided["no"]
+            print(f"🧮 Pre-classifier: {self.decided['no']} auto-rejected, {self.decided['yes']} auto-accepted, "
+                  f"{self.decided['uncertain']} sent to OpenAI ({avoided / total:.1%} of API calls avoided)")
+
+    def save(self, path=MODEL_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"bits": self.bits, "bias": self.bias, "weights": {str(i): w for i, w in self.weights.items()}}, f)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(weights={int(i): w for i, w in data["weights"].items()}, bias=data["bias"], bits=data["bits"])
+
+def load_preclassifier(path=MODEL_PATH):
+    if not os.path.exists(path):
+        return None
+    return FirePreclassifier.load(path)
+
+def is_llm_verdict(verdict):
+    # Pre-classifier answers are the model's own output, not labels
+    return bool(verdict) and "(pre-classifier)" not in str(verdict)
+
+def load_labeled_samples(verdicts_path=LLM_VERDICTS_PATH, live_json_glob="output/live_verified_fires*.json"):
+    # Labels come only from LLM answers:
+    #  1. output/llm_verdicts.jsonl - every verdict the LLM returned, yes and no
+    #  2. output/live_verified_fires*.json - "yes" rows from before that log
+    #     existed; a tweet missing from them is not taken as a "no", since it
+    #     may never have reached the LLM (cache hit, cluster copy, API error)
+    labels = {}
+    if os.path.exists(verdicts_path):
+        with open(verdicts_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                content, verdict = entry.get("content"), entry.get("verdict")
+                if not content or not is_llm_verdict(verdict):
+                    continue
+                labels[normalize_content(content)] = (content, int(str(verdict).lower().startswith("yes")))
+    for path in sorted(glob.glob(live_json_glob)):
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                rows = json.load(f)
+            except ValueError:
+                continue
+        for row in rows:
+            verdict = str(row.get("verification_result", ""))
+            key = normalize_content(row.get("content", ""))
+            if key and key not in labels and is_llm_verdict(verdict) and verdict.lower().startswith("yes"):
+                labels[key] = (row["content"], 1)
+    return list(labels.values())
+
+def split_samples(samples, test_fraction=0.2):
+    train, test = [], []
+    for content, label in samples:
+        # Stable split by content hash so train/evaluate agree across runs
+        bucket = zlib.crc32(normalize_content(content).encode("utf-8")) % 100
+        (test if bucket < test_fraction * 100 else train).append((content, label))
+    return train, test
+
+def evaluate(model, samples):
+    tp = fp = fn = tn = 0
+    auto_yes = auto_yes_correct = auto_no = auto_no_wrong = 0
+    for content, label in samples:
+        p = model.probability(content)
+        predicted = p >= 0.5
+        tp += predicted and label
+        fp += predicted and not label
+        fn += (not predicted) and label
+        tn += (not predicted) and not label
+        if p >= model.accept_threshold:
+            auto_yes += 1
+            auto_yes_correct += label
+        elif p <= model.reject_threshold:
+            auto_no += 1
+            auto_no_wrong += label
+    total = len(samples) or 1
+    positives = (tp + fn) or 1
+    print(f"Samples: {len(samples)} ({tp + fn} LLM 'yes', {fp + tn} LLM 'no')")
+    print(f"Classifier @0.5: precision {tp / ((tp + fp) or 1):.3f} | recall {tp / positives:.3f}")
+    print(f"Gate (reject <= {model.reject_threshold}, accept >= {model.accept_threshold}):")
+    print(f"  auto-rejected {auto_no} ({auto_no / total:.1%}), of which LLM said yes: {auto_no_wrong}")
+    print(f"  auto-accepted {auto_yes} ({auto_yes / total:.1%}), precision {auto_yes_correct / (auto_yes or 1):.3f}")
+    print(f"  API calls avoided: {(auto_yes + auto_no) / total:.1%}")
+    print(f"  pipeline recall vs LLM (uncertain tweets go to the LLM): {1 - auto_no_wrong / positives:.3f}")
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in ("train", "evaluate"):
+        print("Usage: python fire_preclassifier.py train|evaluate")
+        exit(1)
+    samples = load_labeled_samples()
+    train, test = split_samples(samples)
+    if command == "train":
+        model = FirePreclassifier().fit(train)
+        model.save()
+        print(f"Trained on {len(train)} labeled tweets, saved to {MODEL_PATH}")
+        evaluate(model, test)
+    else:
+        model = load_preclassifier()
+        if model is None:
+            print(f"No model at {MODEL_PATH}. Run: python fire_preclassifier.py train")
+            exit(1)
+        evaluate(model, test)
@@ -14,6 +14,60 @@ FIRE_ACCOUNTS = [
 FIRE_SEARCH_COMBINATIONS = [
     f"{state} {fire}" for state in US_STATES for fire in FIRE_KEYWORDS
 ]
+# Relevance keywords and locations used by the 72h verifier and the pre-classifier
+FIRE_INCIDENT_KEYWORDS = [
+    "burn", "evacuate", "evacuation", "damage", "destroy", "blaze", "smoke", "flames", "emergency", "brushfire", "structure fire", "forest fire", "house fire", "apartment fire", "building fire", "outbreak", "spread"
+]
+STRUCTURE_DAMAGE_KEYWORDS = [
+    "structure fire", "building fire", "house fire", "apartment fire", "commercial fire", "warehouse fire", "residential fire", "industrial fire", "office fire", "school fire", "church fire", "hospital fire", "barn fire", "garage fire", "hotel fire", "motel fire", "condo fire", "duplex fire", "multi-family fire", "business fire", "restaurant fire", "store fire", "shopping center fire", "mall fire",
+    "destroyed", "damaged", "total loss", "collapsed", "evacuated"
+]
+US_LOCATIONS = [
+    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut", "Delaware", "Florida",
+    "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky", "Louisiana", "Maine",
+    "Maryland", "Massachusetts", "Michigan", "Minnesota", "Mississippi", "Missouri", "Montana", "Nebraska",
+    "Nevada", "New Hampshire", "New Jersey", "New Mexico", "New York", "North Carolina", "North Dakota", "Ohio",
+    "Oklahoma", "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", "South Dakota", "Tennessee", "Texas",
+    "Utah", "Vermont", "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming",
+    "New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio", "San Diego", "Dallas",
+    "San Jose", "Austin", "Jacksonville", "Fort Worth", "Columbus", "Charlotte", "San Francisco", "Indianapolis",
+    "Seattle", "Denver", "Washington", "Boston", "El Paso", "Nashville", "Detroit", "Oklahoma City", "Portland",
+    "Las Vegas", "Memphis", "Louisville", "Baltimore", "Milwaukee", "Albuquerque", "Tucson", "Fresno", "Sacramento",
+    "Mesa", "Kansas City", "Atlanta", "Omaha", "Colorado Springs", "Raleigh", "Miami", "Long Beach", "Virginia Beach",
+    "Oakland", "Minneapolis", "Tulsa", "Tampa", "Arlington"
+]
+# The 50 states at the head of US_LOCATIONS, plus DC; used to tag verified incidents by state
+US_STATE_NAMES = US_LOCATIONS[:US_LOCATIONS.index("Wyoming") + 1] + ["DC"]
+# State of each city in US_LOCATIONS (the larger one where a name is shared),
+# so incidents naming only a city are tagged with its state too
+CITY_STATES = {
+    "Los Angeles": "California", "Chicago": "Illinois", "Houston": "Texas",
+    "Phoenix": "Arizona", "Philadelphia": "Pennsylvania", "San Antonio": "Texas", "San Diego": "California",
+    "Dallas": "Texas", "San Jose": "California", "Austin": "Texas", "Jacksonville": "Florida",
+    "Fort Worth": "Texas", "Columbus": "Ohio", "Charlotte": "North Carolina", "San Francisco": "California",
+    "Indianapolis": "Indiana", "Seattle": "Washington", "Denver": "Colorado",
+    "Boston": "Massachusetts", "El Paso": "Texas", "Nashville": "Tennessee", "Detroit": "Michigan",
+    "Oklahoma City": "Oklahoma", "Portland": "Oregon", "Las Vegas": "Nevada", "Memphis": "Tennessee",
+    "Louisville": "Kentucky", "Baltimore": "Maryland", "Milwaukee": "Wisconsin", "Albuquerque": "New Mexico",
+    "Tucson": "Arizona", "Fresno": "California", "Sacramento": "California", "Mesa": "Arizona",
+    "Kansas City": "Missouri", "Atlanta": "Georgia", "Omaha": "Nebraska", "Colorado Springs": "Colorado",
+    "Raleigh": "North Carolina", "Miami": "Florida", "Long Beach": "California", "Virginia Beach": "Virginia",
+    "Oakland": "California", "Minneapolis": "Minnesota", "Tulsa": "Oklahoma", "Tampa": "Florida",
+    "Arlington": "Texas",
+}
+# Postal codes, for "City, ST" place lines
+STATE_ABBREVIATIONS = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California", "CO": "Colorado",
+    "CT": "Connecticut", "DE": "Delaware", "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho",
+    "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York", "NC": "North Carolina",
+    "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania",
+    "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas",
+    "UT": "Utah", "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
+    "WI": "Wisconsin", "WY": "Wyoming", "DC": "DC",
+}
 def get_all_fire_accounts():
     return [acc.lstrip('@') for acc in FIRE_ACCOUNTS]
 def get_all_fire_search_combinations():
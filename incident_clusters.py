@@ -0,0 +1,143 @@
+import os
+import re
+import sys
+import time
+import zlib
+from verification_cache import normalize_content
+
+# Near-duplicate index over tweet content. Each tweet gets a one-permutation
+# MinHash signature of its word 3-shingles; LSH banding finds candidate
+# matches and the exact shingle Jaccard confirms them. A tweet joins the
+# cluster of its best match, or starts a new cluster as its representative.
+
+CLUSTER_THRESHOLD = float(os.getenv("CLUSTER_THRESHOLD", "0.7"))
+NUM_BINS = 64
+BAND_ROWS = 4
+SHINGLE_SIZE = 3
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+MASK64 = (1 << 64) - 1
+
+def _mix64(value):
+    # splitmix64 finalizer: spreads crc32 output over 64 bits
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+def shingle_hashes(content, size=SHINGLE_SIZE):
+    tokens = TOKEN_RE.findall(normalize_content(content))
+    if len(tokens) < size:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return {_mix64(zlib.crc32(gram.encode("utf-8"))) for gram in grams}
+
+def minhash_signature(hashes, bins=NUM_BINS):
+    # One-permutation hashing: low bits pick the bin, the rest is the value
+    signature = [None] * bins
+    for h in hashes:
+        b = h % bins
+        value = h // bins
+        if signature[b] is None or value < signature[b]:
+            signature[b] = value
+    if all(value is None for value in signature):
+        return signature
+    # Rotation densification: empty bins borrow from the next filled bin
+    for b in range(bins):
+        if signature[b] is None:
+            offset = 1
+            while signature[(b + offset) % bins] is None:
+                offset += 1
+            signature[b] = (signature[(b + offset) % bins], offset)
+    return signature
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class IncidentClusterIndex:
+    def __init__(self, threshold=CLUSTER_THRESHOLD, bins=NUM_BINS, band_rows=BAND_ROWS):
+        self.threshold = threshold
+        self.bins = bins
+        self.band_rows = band_rows
+        self._buckets = {}
+        self._shingles = []
+        self._cluster_of = []
+        self.cluster_sizes = {}
+
+    def add(self, content):
+        # Returns (doc_id, cluster_id); cluster_id == doc_id for a new representative
+        doc_id = len(self._shingles)
+        hashes = shingle_hashes(content)
+        signature = minhash_signature(hashes, self.bins)
+        band_keys = [
+            (start, tuple(signature[start:start + self.band_rows]))
+            for start in range(0, self.bins, self.band_rows)
+        ]
+        best, best_score = None, self.threshold
+        if hashes:
+            seen = set()
+            for key in band_keys:
+                for candidate in self._buckets.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    score = jaccard(hashes, self._shingles[candidate])
+                    if score >= best_score:
+                        best, best_score = candidate, score
+        cluster_id = self._cluster_of[best] if best is not None else doc_id
+        self._shingles.append(hashes)
+        self._cluster_of.append(cluster_id)
+        self.cluster_sizes[cluster_id] = self.cluster_sizes.get(cluster_id, 0) + 1
+        if hashes:
+            for key in band_keys:
+                self._buckets.setdefault(key, []).append(doc_id)
+        return doc_id, cluster_id
+
+    def __len__(self):
+        return len(self._shingles)
+
+    def report(self):
+        tweets = len(self._shingles)
+        clusters = len(self.cluster_sizes)
+        if tweets:
+            print(f"🧩 Incident clusters: {tweets} tweets in {clusters} clusters, "
+                  f"{tweets - clusters} verdicts propagated instead of verified ({1 - clusters / tweets:.1%} fewer calls)")
+
+def cluster_tweets(tweets, threshold=CLUSTER_THRESHOLD):
+    index = IncidentClusterIndex(threshold)
+    return [index.add(tweet.get("content", ""))[1] for tweet in tweets], index
+
+def run_benchmark(path, scale=10000, threshold=CLUSTER_THRESHOLD):
+    from tweet_filter import iter_tweets
+    tweets = list(iter_tweets(path))
+    started = time.perf_counter()
+    _, index = cluster_tweets(tweets, threshold)
+    elapsed = time.perf_counter() - started
+    print(f"{path}: {len(tweets)} tweets -> {len(index.cluster_sizes)} clusters "
+          f"({1 - len(index.cluster_sizes) / max(len(tweets), 1):.1%} fewer LLM calls) in {elapsed:.2f}s "
+          f"= {elapsed * 10000 / max(len(tweets), 1):.2f}s per 10k tweets")
+    largest = sorted(index.cluster_sizes.items(), key=lambda item: -item[1])[:5]
+    for cluster_id, size in largest:
+        print(f"  {size:4d} x {tweets[cluster_id].get('content', '')[:80]!r}")
+    # Synthetic scale run: cycle the file, varying a number per copy the way
+    # scanner accounts repost the same template with a new address or unit
+    synthetic = [
+        {"content": f"{tweets[i % len(tweets)].get('content', '')} {i // len(tweets)}"}
+        for i in range(scale)
+    ]
+    started = time.perf_counter()
+    _, index = cluster_tweets(synthetic, threshold)
+    elapsed = time.perf_counter() - started
+    print(f"synthetic: {scale} tweets -> {len(index.cluster_sizes)} clusters in {elapsed:.2f}s "
+          f"= {elapsed * 10000 / scale:.2f}s per 10k tweets")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "benchmark":
+        print("Usage: python incident_clusters.py benchmark [tweets_raw.json] [synthetic_count]")
+        exit(1)
+    run_benchmark(
+        sys.argv[2] if len(sys.argv) > 2 else "25jul_tweets_raw.json",
+        int(sys.argv[3]) if len(sys.argv) > 3 else 10000,
+    )
@@ -0,0 +1,307 @@
+import os
+import re
+import sys
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+from live_journal import FileLock
+from keyword_matcher import match_tweet
+from fire_search_targets import CITY_STATES, STATE_ABBREVIATIONS, US_STATE_NAMES
+
+# Verified incidents partitioned by published_date: one JSONL file per day
+# (or hour) plus a manifest with each partition's row count, time span and
+# per-state counts. Window queries open only the partitions whose bounds
+# overlap the window (and that mention the state asked for), so their cost
+# follows the window, not the total history. Old partitions can be
+# rewritten as Parquet (archive), which queries read transparently.
+
+INCIDENT_STORE_DIR = os.getenv("INCIDENT_STORE_DIR", "output/incidents")
+# "day" or "hour"; fixed by the manifest once the store exists
+INCIDENT_PARTITION = os.getenv("INCIDENT_PARTITION", "day")
+# Rows whose published_date does not parse; only returned by unbounded queries
+UNDATED_PARTITION = "undated"
+PARTITION_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H"}
+PARTITION_SPANS = {"day": timedelta(days=1), "hour": timedelta(hours=1)}
+# Bumped when incident_state changes; older manifests get their per-partition
+# state counts recomputed on open
+STATE_TAGS_VERSION = 3
+# "Winnfield, Louisiana", "Oceanside, CA", "Kansas City, Kansas": a place
+# followed by its state, which beats any other state or city in the text
+STATE_PAIR_RE = re.compile(
+    r"\b[A-Z][\w.'-]*,\s*(?P<state>"
+    + "|".join(re.escape(name) for name in sorted(set(US_STATE_NAMES) | set(STATE_ABBREVIATIONS), key=len, reverse=True))
+    + r"|D\.C\.?)(?![\w-])"
+)
+# Washington DC is its own value, not Washington state
+DC_RE = re.compile(r"\bWashington,?\s+D\.?C\b|\bD\.C\.|\bDistrict of Columbia\b")
+
+def parse_published(value):
+    try:
+        published = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.astimezone(timezone.utc)
+
+def incident_state(row):
+    # Washington DC first, then a "Place, State" pair, then the first state
+    # named, then the state of the first city named; the same again for the
+    # source account's name ("Scanner Traffic-- Fort Worth"); "" when none
+    # is. A state name that is only the start of a city in another state
+    # ("Kansas" in "Kansas City") does not count.
+    for text in (row.get("content"), row.get("source")):
+        text = text or ""
+        if DC_RE.search(text):
+            return "DC"
+        pair = STATE_PAIR_RE.search(text)
+        if pair:
+            state = pair.group("state")
+            return "DC" if state.startswith("D.C") else STATE_ABBREVIATIONS.get(state, state)
+        found = match_tweet(text)
+        states = [
+            state for state in found["state"]
+            if not any(city.startswith(state + " ") and CITY_STATES[city] != state for city in found["city"])
+        ]
+        if states:
+            return states[0]
+        if found["city"]:
+            return CITY_STATES[found["city"][0]]
+    return ""
+
+def incident_key(row):
+    raw = json.dumps([row.get("url"), row.get("content")], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def export_incidents(rows, json_path, xlsx_path=None):
+    if os.path.dirname(json_path):
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    if xlsx_path and rows:
+        import pandas as pd
+        pd.DataFrame(rows).to_excel(xlsx_path, index=False)
+
+class IncidentStore:
+    def __init__(self, root=INCIDENT_STORE_DIR, granularity=INCIDENT_PARTITION):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.manifest = self._load_manifest(granularity)
+        self.granularity = self.manifest["granularity"]
+        # Per-partition dedup keys, reloaded when another process grew the file
+        self._keys = {}
+        if self.manifest.get("state_tags") != STATE_TAGS_VERSION:
+            self._retag_states()
+
+    def _load_manifest(self, granularity):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                try:
+                    return json.load(f)
+                except json.JSONDecodeError:
+                    pass
+        if granularity not in PARTITION_FORMATS:
+            raise ValueError(f"INCIDENT_PARTITION must be one of {', '.join(PARTITION_FORMATS)}, got {granularity!r}")
+        return {"granularity": granularity, "partitions": {}, "sources": {}, "state_tags": STATE_TAGS_VERSION}
+
+    def _write_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _retag_states(self):
+        # State counts written by an older incident_state would make state
+        # queries skip partitions, so they are rebuilt from the rows once
+        os.makedirs(self.root, exist_ok=True)
+        with FileLock(self.manifest_path):
+            self.manifest = self._load_manifest(self.granularity)
+            if self.manifest.get("state_tags") == STATE_TAGS_VERSION:
+                return
+            for name, info in self.manifest["partitions"].items():
+                states = {}
+                for row in self._read_partition(name):
+                    state = incident_state(row)
+                    if state:
+                        states[state] = states.get(state, 0) + 1
+                info["states"] = states
+            self.manifest["state_tags"] = STATE_TAGS_VERSION
+            self._write_manifest()
+
+    def partition_path(self, name):
+        return os.path.join(self.root, f"{name}.jsonl")
+
+    def archive_path(self, name):
+        return os.path.join(self.root, f"{name}.parquet")
+
+    def partition_for(self, row):
+        published = parse_published(row.get("published_date", ""))
+        if published is None:
+            return UNDATED_PARTITION
+        return published.strftime(PARTITION_FORMATS[self.granularity])
+
+    def partition_bounds(self, name):
+        start = datetime.strptime(name, PARTITION_FORMATS[self.granularity]).replace(tzinfo=timezone.utc)
+        return start, start + PARTITION_SPANS[self.granularity]
+
+    def _partition_keys(self, name):
+        path = self.partition_path(name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._keys.get(name)
+        if cached is None or cached[0] != size:
+            cached = (size, {incident_key(row) for row in self._read_partition(name)})
+            self._keys[name] = cached
+        return cached[1]
+
+    def _read_partition(self, name, since=None, until=None):
+        # Archived rows (Parquet, time window pushed down) then rows added since
+        archived = self.archive_path(name)
+        if os.path.exists(archived):
+            from tweet_archive import iter_archive
+            yield from iter_archive(archived, since=since, until=until)
+        path = self.partition_path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Truncated last line from a crash mid-append
+                    continue
+
+    def add(self, rows):
+        by_partition = {}
+        for row in rows:
+            by_partition.setdefault(self.partition_for(row), []).append(row)
+        if not by_partition:
+            return 0
+        added = 0
+        os.makedirs(self.root, exist_ok=True)
+        with FileLock(self.manifest_path):
+            self.manifest = self._load_manifest(self.granularity)
+            for name, partition_rows in by_partition.items():
+                keys = self._partition_keys(name)
+                info = self.manifest["partitions"].setdefault(name, {"count": 0, "first": "", "last": "", "states": {}})
+                lines = []
+                for row in partition_rows:
+                    key = incident_key(row)
+                    if key in keys:
+                        continue
+                    keys.add(key)
+                    lines.append(json.dumps(row, ensure_ascii=False) + "\n")
+                    published = row.get("published_date", "")
+                    info["count"] += 1
+                    if published and (not info["first"] or published < info["first"]):
+                        info["first"] = published
+                    if published > info["last"]:
+                        info["last"] = published
+                    state = incident_state(row)
+                    if state:
+                        info["states"][state] = info["states"].get(state, 0) + 1
+                if not lines:
+                    continue
+                path = self.partition_path(name)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._keys[name] = (os.path.getsize(path), keys)
+                added += len(lines)
+            self._write_manifest()
+        return added
+
+    def import_json(self, json_path):
+        # Backfills a live_verified_fires*.json array; skipped while the file
+        # is unchanged since its last import
+        stat = os.stat(json_path)
+        signature = [stat.st_size, stat.st_mtime]
+        if self.manifest["sources"].get(json_path) == signature:
+            return 0
+        with open(json_path, "r", encoding="utf-8") as f:
+            try:
+                rows = json.load(f)
+            except json.JSONDecodeError:
+                return 0
+        added = self.add(rows)
+        with FileLock(self.manifest_path):
+            self.manifest = self._load_manifest(self.granularity)
+            self.manifest["sources"][json_path] = signature
+            self._write_manifest()
+        return added
+
+    def partitions(self, since=None, until=None, state=None):
+        names = []
+        for name, info in sorted(self.manifest["partitions"].items()):
+            if state and state.lower() not in {s.lower() for s in info["states"]}:
+                continue
+            if name == UNDATED_PARTITION:
+                if since is None and until is None:
+                    names.append(name)
+                continue
+            start, end = self.partition_bounds(name)
+            if (since is None or end > since) and (until is None or start < until):
+                names.append(name)
+        return names
+
+    def query(self, since=None, until=None, state=None):
+        # Rows with since <= published_date < until (either end open), in
+        # partition order; state matches the state tagged from the content
+        for name in self.partitions(since, until, state):
+            for row in self._read_partition(name, since, until):
+                if since is not None or until is not None:
+                    published = parse_published(row.get("published_date", ""))
+                    if published is None or (since is not None and published < since) or (until is not None and published >= until):
+                        continue
+                if state and incident_state(row).lower() != state.lower():
+                    continue
+                yield row
+
+    def archive(self, older_than_days, now=None):
+        # Rewrites partitions that ended more than `older_than_days` ago as
+        # compressed Parquet (tweet_archive); late rows go to a fresh JSONL beside it
+        from tweet_archive import write_archive
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+        archived = 0
+        with FileLock(self.manifest_path):
+            self.manifest = self._load_manifest(self.granularity)
+            for name in list(self.manifest["partitions"]):
+                if name == UNDATED_PARTITION or not os.path.exists(self.partition_path(name)):
+                    continue
+                if self.partition_bounds(name)[1] > cutoff:
+                    continue
+                rows = list(self._read_partition(name))
+                write_archive(rows, self.archive_path(name), "verified")
+                os.remove(self.partition_path(name))
+                self._keys.pop(name, None)
+                self.manifest["partitions"][name]["archived"] = True
+                archived += 1
+            self._write_manifest()
+        return archived
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    store = IncidentStore()
+    if command == "import":
+        # python incident_store.py import output/live_verified_fires*.json
+        for path in sys.argv[2:]:
+            print(f"{path}: {store.import_json(path)} new incidents")
+    elif command == "archive":
+        # python incident_store.py archive [days]: Parquet for partitions older than that
+        days = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+        print(f"Archived {store.archive(days)} partitions older than {days:g} days to Parquet")
+    elif command == "show":
+        partitions = store.manifest["partitions"]
+        for name, info in sorted(partitions.items()):
+            states = ", ".join(f"{s} {n}" for s, n in sorted(info["states"].items(), key=lambda item: -item[1]))
+            print(f"{name}: {info['count']} incidents  {states}")
+        print(f"{sum(info['count'] for info in partitions.values())} incidents in {len(partitions)} {store.granularity} partitions under {store.root}")
+    else:
+        print("Usage: python incident_store.py show")
+        print("       python incident_store.py import <live_verified_fires.json> ...")
+        print("       python incident_store.py archive [days]")
+        exit(1)
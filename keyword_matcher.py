@@ -0,0 +1,117 @@
+import re
+import sys
+import time
+from fire_search_targets import FIRE_INCIDENT_KEYWORDS, STRUCTURE_DAMAGE_KEYWORDS, US_LOCATIONS, US_STATE_NAMES
+
+# One compiled alternation over every fire keyword, damage keyword, state and
+# city, scanned once per tweet. Matches start on a word boundary, so "Mesa"
+# no longer fires inside "Mesabi". Keyword groups are stems ("burn" also
+# matches "burned", "burning"); place names must end on a word boundary.
+# Longer terms win at a position ("West Virginia" over "Virginia"), and every
+# shorter term the match starts with is reported too ("Oklahoma City" also
+# reports the state Oklahoma).
+
+def _trie_pattern(node):
+    # Longer continuations are tried before a term ending at this node; a stem
+    # ends with any word characters, a whole word on a word boundary
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if "" in node:
+        branches.append(r"\w*" if node[""] else r"\b")
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+class KeywordMatcher:
+    def __init__(self, groups, stem_groups=()):
+        # groups: {"group": [terms]}; matching is case-insensitive and any
+        # run of whitespace matches a space in a term (text is lowercased and
+        # its whitespace collapsed before the scan)
+        self.groups = list(groups)
+        self._terms = {}
+        for group, terms in groups.items():
+            stem = group in stem_groups
+            for term in terms:
+                key = " ".join(term.lower().split())
+                entry = self._terms.setdefault(key, {"groups": {}, "stem": False})
+                entry["groups"].setdefault(group, term)
+                entry["stem"] = entry["stem"] or stem
+        # Character trie of the terms as one regex, so each position costs a
+        # first-character test instead of a try per term
+        trie = {}
+        for key, entry in self._terms.items():
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[""] = entry["stem"]
+        self.pattern = re.compile(r"\b" + _trie_pattern(trie))
+
+    def _terms_in(self, text):
+        # Terms the matched text starts with, longest last
+        for i in range(1, len(text) + 1):
+            entry = self._terms.get(text[:i])
+            if entry is None:
+                continue
+            if i == len(text) or entry["stem"] or not (text[i].isalnum() or text[i] == "_"):
+                yield entry
+
+    def match(self, text):
+        # {"group": [terms in order of first appearance]} for every group
+        found = {group: [] for group in self.groups}
+        for m in self.pattern.finditer(" ".join((text or "").lower().split())):
+            for entry in self._terms_in(m.group(0)):
+                for group, term in entry["groups"].items():
+                    if term not in found[group]:
+                        found[group].append(term)
+        return found
+
+def fire_matcher():
+    states = set(US_STATE_NAMES)
+    return KeywordMatcher({
+        "fire": FIRE_INCIDENT_KEYWORDS,
+        "damage": STRUCTURE_DAMAGE_KEYWORDS,
+        "state": US_STATE_NAMES,
+        "city": [loc for loc in US_LOCATIONS if loc not in states],
+    }, stem_groups=("fire", "damage"))
+
+FIRE_MATCHER = fire_matcher()
+
+def match_tweet(text):
+    return FIRE_MATCHER.match(text)
+
+def is_relevant_match(found):
+    # A fire keyword plus either structure damage or a US place. "warehouse
+    # fire" and the like count as fire keywords too: the substring scan only
+    # caught them through the "house fire" inside "warehouse fire".
+    fire_present = bool(found["fire"]) or any(term.endswith(" fire") for term in found["damage"])
+    return fire_present and bool(found["damage"] or found["state"] or found["city"])
+
+def _substring_relevant(text):
+    # The per-keyword `in` scan the matcher replaced, kept for the benchmark
+    content = text.lower()
+    fire_present = any(kw in content for kw in FIRE_INCIDENT_KEYWORDS)
+    structure_damage_present = any(kw in content for kw in STRUCTURE_DAMAGE_KEYWORDS)
+    location_present = any(loc.lower() in content for loc in US_LOCATIONS)
+    return fire_present and (structure_damage_present or location_present)
+
+if __name__ == "__main__":
+    # Micro-benchmark: python keyword_matcher.py [tweet dumps ...]
+    from tweet_filter import iter_tweets
+    paths = sys.argv[1:] or ["25jul_tweets_raw.json", "25jul_cleaned_tweets.json"]
+    texts = [tweet.get("content", "") for path in paths for tweet in iter_tweets(path)]
+    repeat = max(1, 50000 // max(len(texts), 1))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        old = [_substring_relevant(text) for text in texts]
+    old_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(repeat):
+        new = [is_relevant_match(match_tweet(text)) for text in texts]
+    new_seconds = time.perf_counter() - started
+    scans = len(texts) * repeat
+    print(f"{len(texts)} tweets from {', '.join(paths)}, {repeat} passes, {len(FIRE_MATCHER._terms)} patterns")
+    print(f"substring scan:  {old_seconds:.2f}s  {scans / old_seconds:10.0f} tweets/s  {sum(old)} relevant")
+    print(f"compiled matcher: {new_seconds:.2f}s  {scans / new_seconds:10.0f} tweets/s  {sum(new)} relevant")
+    changed = [text for text, a, b in zip(texts, old, new) if a != b]
+    print(f"{len(changed)} tweets judged differently, e.g.:")
+    for text in changed[:5]:
+        print(f"  {'relevant' if is_relevant_match(match_tweet(text)) else 'not relevant'} now: {' '.join(text.split())[:100]}")
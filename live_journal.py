@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Append-only journal behind live_verified_fires*.json. Writers append one
+# JSON line under an OS-level lock; compaction rewrites the JSON array that
+# consumers read; readers can tail the journal from a byte offset.
+
+class FileLock:
+    # Exclusive lock on a sidecar "<path>.lock" file, held across processes
+    def __init__(self, path):
+        self.lock_path = path + ".lock"
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.lock_path, "a+")
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 s of contention; keep waiting
+                    continue
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+def journal_path_for(json_path):
+    return os.path.splitext(json_path)[0] + ".jsonl"
+
+def ensure_journal(json_path):
+    # Seed the journal from a JSON array written before journaling existed,
+    # so the first compaction does not drop those rows
+    journal_path = journal_path_for(json_path)
+    with FileLock(journal_path):
+        if os.path.exists(journal_path) or not os.path.exists(json_path):
+            return journal_path
+        with open(json_path, "r", encoding="utf-8") as f:
+            try:
+                rows = json.load(f)
+            except json.JSONDecodeError:
+                rows = []
+        with open(journal_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return journal_path
+
+def append_entry(journal_path, entry):
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with FileLock(journal_path):
+        with open(journal_path, "ab+") as f:
+            # A crash mid-append leaves a line without its newline; end it so
+            # this entry is not glued onto it (readers skip the broken line)
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line
+            f.write(line.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+def read_entries(journal_path, offset=0):
+    # Returns (entries, next_offset). Only complete lines are consumed, so a
+    # reader racing a writer picks up a half-written line on its next call;
+    # a complete line that does not parse (the remains of a crashed append)
+    # is skipped.
+    entries = []
+    if not os.path.exists(journal_path):
+        return entries, offset
+    with open(journal_path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line.decode("utf-8")))
+            except ValueError:
+                continue
+    return entries, offset
+
+def follow(journal_path, offset=0, interval=1.0):
+    while True:
+        entries, offset = read_entries(journal_path, offset)
+        for entry in entries:
+            yield entry
+        if not entries:
+            time.sleep(interval)
+
+def compact(journal_path, json_path=None):
+    json_path = json_path or os.path.splitext(journal_path)[0] + ".json"
+    # Held for the whole rewrite so concurrent compactions cannot publish an older snapshot
+    with FileLock(journal_path):
+        entries, _ = read_entries(journal_path)
+        tmp_path = json_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, json_path)
+    return len(entries)
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in ("compact", "tail", "watch") or len(sys.argv) < 3:
+        print("Usage: python live_journal.py compact <journal.jsonl> [output.json]")
+        print("       python live_journal.py tail <journal.jsonl>")
+        print("       python live_journal.py watch <journal.jsonl> [output.json] [interval_seconds]")
+        exit(1)
+    journal = sys.argv[2]
+    if command == "compact":
+        count = compact(journal, sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"Compacted {count} entries from {journal}")
+    elif command == "tail":
+        for entry in follow(journal):
+            print(json.dumps(entry, ensure_ascii=False))
+    else:
+        # Background compaction: refresh the JSON array whenever the journal grows
+        output = sys.argv[3] if len(sys.argv) > 3 else None
+        interval = float(sys.argv[4]) if len(sys.argv) > 4 else 10.0
+        last_size = -1
+        while True:
+            size = os.path.getsize(journal) if os.path.exists(journal) else 0
+            if size != last_size:
+                count = compact(journal, output)
+                print(f"[{time.strftime('%H:%M:%S')}] Compacted {count} entries from {journal}")
+                last_size = size
+            time.sleep(interval)
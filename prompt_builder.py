@@ -0,0 +1,223 @@
+import os
+import re
+import sys
+import json
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Prompts for the fire verifier. All fixed instructions live in the system
+# message, byte-identical across calls, and the tweet comes last, so the
+# provider's prompt-prefix cache can reuse everything before it (OpenAI only
+# caches prefixes of 1024 tokens and up, i.e. large combined batches). Tweets are
+# cleaned of URLs, unit callsign lists and extra whitespace, then trimmed to
+# a token budget instead of a character count.
+
+# Token budgets for one tweet's content in each kind of call
+VERIFY_CONTENT_TOKENS = int(os.getenv("PROMPT_VERIFY_TOKENS", "512"))
+SCORE_CONTENT_TOKENS = int(os.getenv("PROMPT_SCORE_TOKENS", "256"))
+COMBINED_CONTENT_TOKENS = int(os.getenv("PROMPT_COMBINED_TOKENS", "256"))
+TOKENIZER_ENCODING = "o200k_base"
+# Runs of at least this many dispatch callsigns ("Engine 62, Truck 31, ...")
+# become a unit count
+MIN_CALLSIGN_RUN = 3
+
+URL_RE = re.compile(r"(?:https?://|www\.|pic\.twitter\.com/)\S+", re.IGNORECASE)
+# Only apparatus names that mean a fire/EMS unit on their own; "Unit 5",
+# "Car 3" or "M 5" may be what the tweet is about and are left alone
+CALLSIGN = r"(?:Engine|Truck|Ladder|Quint|Quinn|Squad|Rescue|Medic|Battalion|Tower|Brush|Tanker|Ambulance)\s?-?\d{1,4}[A-Z]?"
+CALLSIGN_RUN_RE = re.compile(
+    rf"\b{CALLSIGN}(?:(?:\s*[,;/&]\s*|\s+and\s+|\s+with\s+|\s+)(?:and\s+|with\s+)?{CALLSIGN}){{{MIN_CALLSIGN_RUN - 1},}}\b"
+)
+CALLSIGN_RE = re.compile(rf"\b{CALLSIGN}\b")
+SPACE_RE = re.compile(r"[ \t]+")
+BLANK_LINES_RE = re.compile(r"\s*\n\s*")
+# Fallback token estimate: words and punctuation marks, long words counted
+# as several tokens (close to o200k_base on English tweet text)
+TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+_encoding = None
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        _encoding = False
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception:
+                # The encoding file is downloaded on first use; offline, estimate instead
+                pass
+    return _encoding
+
+def _piece_tokens(piece):
+    return 1 + (len(piece) - 1) // 6
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return sum(_piece_tokens(m.group(0)) for m in TOKEN_PIECE_RE.finditer(text))
+
+def trim_to_tokens(text, max_tokens):
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    used = 0
+    for m in TOKEN_PIECE_RE.finditer(text):
+        used += _piece_tokens(m.group(0))
+        if used > max_tokens:
+            return text[:m.start()].rstrip()
+    return text
+
+def clean_content(content):
+    text = URL_RE.sub("", content or "")
+    text = CALLSIGN_RUN_RE.sub(lambda m: f"[{len(CALLSIGN_RE.findall(m.group(0)))} fire units]", text)
+    text = SPACE_RE.sub(" ", text)
+    return BLANK_LINES_RE.sub("\n", text).strip()
+
+def prepare_content(content, max_tokens):
+    return trim_to_tokens(clean_content(content), max_tokens)
+
+# Shared by the instruction blocks below; kept verbatim so every prompt of a
+# kind starts with the same bytes
+FIRE_CRITERIA = (
+    "a fire incident in the United States that likely caused damage to physical structures "
+    "(homes, apartments, offices, commercial buildings, factories, or infrastructure), whatever the cause "
+    "(electrical faults, negligence, accidents, natural disasters such as wildfires, or arson). "
+)
+CONTENT_NOTE = (
+    "Only use the provided content; do not infer details not present in the text. "
+    "Links were removed, and lists of responding unit callsigns are shortened to a count such as '[5 fire units]'."
+)
+
+VERIFICATION_INSTRUCTIONS = (
+    "You evaluate tweets and news snippets for fire damage or destruction in the United States. "
+    "Answer 'yes' if the content describes " + FIRE_CRITERIA +
+    "Be inclusive: if such a fire is plausible, even if not 100% explicit, answer 'yes'. Otherwise answer 'no'. " + CONTENT_NOTE
+)
+
+SCORE_INSTRUCTIONS = (
+    "You rate how strongly a tweet is related to fire damage or destruction in the United States, "
+    "from 0 (not related at all) to 10 (definitely about fire damage or destruction in the USA). "
+    "Only use the tweet content. Respond with a single integer from 0 to 10."
+)
+
+COMBINED_INSTRUCTIONS = (
+    "You evaluate tweets and news snippets for fire damage or destruction in the United States and answer only with JSON. "
+    "For each input, the verdict is 'yes' if it describes " + FIRE_CRITERIA +
+    "Be inclusive: if such a fire is plausible, even if not 100% explicit, the verdict is 'yes'; otherwise 'no'. "
+    "Also score each from 0 (not related to fire damage or destruction in the USA) to 10 (definitely about it). " + CONTENT_NOTE + " "
+    'Respond with a JSON object of the form {"results": [{"id": <id>, "verdict": "yes" or "no", "score": <integer 0-10>}]} '
+    "with exactly one entry per input id."
+)
+
+def verification_messages(content, max_tokens=VERIFY_CONTENT_TOKENS):
+    return [
+        {"role": "system", "content": VERIFICATION_INSTRUCTIONS},
+        {"role": "user", "content": f"Content: {prepare_content(content, max_tokens)}"},
+    ]
+
+def score_messages(content, max_tokens=SCORE_CONTENT_TOKENS):
+    return [
+        {"role": "system", "content": SCORE_INSTRUCTIONS},
+        {"role": "user", "content": f"Tweet content: {prepare_content(content, max_tokens)}"},
+    ]
+
+def combined_messages(contents, max_tokens=COMBINED_CONTENT_TOKENS):
+    tweets_block = json.dumps(
+        [{"id": i, "content": prepare_content(content, max_tokens)} for i, content in enumerate(contents)],
+        ensure_ascii=False,
+    )
+    return [
+        {"role": "system", "content": COMBINED_INSTRUCTIONS},
+        {"role": "user", "content": f"Tweets: {tweets_block}"},
+    ]
+
+def message_tokens(messages):
+    # Chat formatting adds a few tokens per message on top of the text
+    return sum(count_tokens(m["content"]) + 4 for m in messages) + 3
+
+def _previous_verification_messages(content, url):
+    # The layout used before this module (prompt version 1), for the benchmark
+    prompt = (
+        "You are given the content of a tweet or news snippet. Determine if it describes a fire incident in the United States that likely caused damage to physical structures (such as homes, apartments, offices, commercial buildings, factories, or infrastructure). "
+        "The fire may have resulted in structural damage or destruction, due to causes like electrical faults, negligence, accidents, natural disasters (e.g., wildfires), or arson. "
+        "Be inclusive: If the tweet/news suggests a fire incident with possible or likely damage to structures, even if not 100% explicit, respond with 'yes'. "
+        "Respond with 'yes' if the tweet/news is about a fire incident in the USA that could have caused damage to physical structures. Otherwise, respond with 'no'.\n\n"
+        f"Content: {content[:4000]}\nURL: {url}\n"
+        "Only use the provided content for your evaluation. Do not infer or assume details not present in the text, but err on the side of inclusion if the fire incident is plausible."
+    )
+    return [
+        {"role": "system", "content": "You are an AI tasked with evaluating tweets to determine if they describe fire damages or destruction in the United States. Be inclusive: If the tweet/news is plausibly about fire damages or destruction in the USA, mark as 'yes'."},
+        {"role": "user", "content": prompt},
+    ]
+
+def _previous_score_messages(content):
+    prompt = (
+        "On a scale of 0 to 10, how strongly is the following tweet related to fire damages or destruction in the United States? "
+        "A score of 0 means not related at all, 10 means it is definitely about fire damages or destruction in the USA. "
+        "Only use the tweet content for your evaluation.\n\n"
+        f"Tweet content: {content[:2000]}"
+    )
+    return [
+        {"role": "system", "content": "You are an AI that rates the fire-relatedness of tweets about fire damages or destruction in the USA. Respond with a single integer from 0 to 10."},
+        {"role": "user", "content": prompt},
+    ]
+
+def _shared_prefix_tokens(prompts):
+    # Tokens before the first character that differs between any two prompts
+    first = prompts[0]
+    length = len(first)
+    for prompt in prompts[1:]:
+        i = 0
+        while i < length and i < len(prompt) and prompt[i] == first[i]:
+            i += 1
+        length = i
+    return count_tokens(first[:length])
+
+# (content, cleaned content) pairs for `python prompt_builder.py check`
+CLEAN_CASES = [
+    ("Engine 62, Quinn 61, Battalion 55, Squad 55, Engine 55, Truck 31, with Engine 57 en route, house fire",
+     "[7 fire units] en route, house fire"),
+    ("Fire out. Holding Engine 7, Engine 14, Truck 14.", "Fire out. Holding [3 fire units]."),
+    ("Engine 7 and Truck 14 on scene", "Engine 7 and Truck 14 on scene"),
+    ("Unit 5, Unit 6 and Unit 7 destroyed by the fire", "Unit 5, Unit 6 and Unit 7 destroyed by the fire"),
+    ("Car 3, Car 4, Car 5 burned in the garage fire", "Car 3, Car 4, Car 5 burned in the garage fire"),
+    ("Units M 5 T 6 R 7 E 8 on scene", "Units M 5 T 6 R 7 E 8 on scene"),
+    ("Apartment fire https://t.co/abc123 in Dallas", "Apartment fire in Dallas"),
+]
+
+def check_clean_content():
+    for content, expected in CLEAN_CASES:
+        cleaned = clean_content(content)
+        assert cleaned == expected, (content, cleaned)
+    return len(CLEAN_CASES)
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["check"]:
+        print(f"OK: {check_clean_content()} clean_content cases")
+        exit(0)
+    # Offline benchmark: python prompt_builder.py [tweet dumps ...]
+    from tweet_filter import iter_tweets
+    paths = sys.argv[1:] or ["25jul_tweets_raw.json", "25jul_cleaned_tweets.json"]
+    tweets = [tweet for path in paths for tweet in iter_tweets(path)]
+    print(f"{len(tweets)} tweets from {', '.join(paths)}; token counts from "
+          f"{'tiktoken ' + TOKENIZER_ENCODING if _get_encoding() else 'the offline estimate (tiktoken unavailable)'}")
+    print(f"{'call':<8} {'before':>8} {'after':>8} {'saved':>7}   static prefix before -> after")
+    for kind, before_fn, after_fn in (
+        ("verify", lambda t: _previous_verification_messages(t.get("content", ""), t.get("tweet_url", "")), lambda t: verification_messages(t.get("content", ""))),
+        ("score", lambda t: _previous_score_messages(t.get("content", "")), lambda t: score_messages(t.get("content", ""))),
+    ):
+        before = [before_fn(tweet) for tweet in tweets]
+        after = [after_fn(tweet) for tweet in tweets]
+        before_avg = sum(map(message_tokens, before)) / len(tweets)
+        after_avg = sum(map(message_tokens, after)) / len(tweets)
+        flatten = lambda messages: "\n".join(m["content"] for m in messages)
+        print(f"{kind:<8} {before_avg:8.1f} {after_avg:8.1f} {1 - after_avg / before_avg:7.1%}   "
+              f"{_shared_prefix_tokens([flatten(m) for m in before])} -> {_shared_prefix_tokens([flatten(m) for m in after])} tokens")
+    content_before = sum(count_tokens(t.get("content", "")) for t in tweets) / len(tweets)
+    content_after = sum(count_tokens(prepare_content(t.get("content", ""), VERIFY_CONTENT_TOKENS)) for t in tweets) / len(tweets)
+    print(f"tweet content alone: {content_before:.1f} -> {content_after:.1f} tokens on average after removing links and callsign lists")
@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+from fire_search_targets import US_STATES, FIRE_KEYWORDS, get_all_fire_accounts
+
+# Combines the state x keyword searches and the from: searches into OR
+# queries so one page load covers several of them. A combined query that
+# comes back truncated is split in half and both halves are searched again,
+# down to the original single-term queries.
+
+# Keywords OR-ed into one query per state, and accounts per from: query
+KEYWORD_GROUP_SIZE = int(os.getenv("QUERY_KEYWORD_GROUP_SIZE", "8"))
+ACCOUNT_GROUP_SIZE = int(os.getenv("QUERY_ACCOUNT_GROUP_SIZE", "10"))
+# Tweet budget per term, so a combined query may collect what its flat
+# queries would have together
+TWEETS_PER_TERM = 10
+# Scroll cap per term: it grows with the tweet budget, so a combined query
+# that is still finding tweets is not cut off (and split) by the scroll cap
+SCROLLS_PER_TERM = 10
+# Stops that mean more results were left unread: the tweet budget filled up,
+# or the scroll budget ran out with the timeline still growing
+TRUNCATED_STOPS = ("max_tweets", "scroll_limit")
+
+def make_group(kind, terms, prefix=""):
+    return {"kind": kind, "prefix": prefix, "terms": list(terms)}
+
+def group_query(group):
+    # Single-term groups give exactly the flat query strings, so watermarks
+    # and logs line up with the flat crawl
+    terms = group["terms"]
+    if group["kind"] == "account":
+        return " OR ".join(f"from:{account}" for account in terms)
+    if len(terms) == 1:
+        return f"{group['prefix']} {terms[0]}"
+    # Parenthesised terms keep the flat query's all-words-must-match meaning
+    return f"{group['prefix']} ({' OR '.join(f'({term})' for term in terms)})"
+
+def tweet_budget(group):
+    return TWEETS_PER_TERM * len(group["terms"])
+
+def scroll_budget(group):
+    return SCROLLS_PER_TERM * len(group["terms"])
+
+def plan_queries(states=None, keywords=None, accounts=None, keyword_group_size=KEYWORD_GROUP_SIZE, account_group_size=ACCOUNT_GROUP_SIZE):
+    states = US_STATES if states is None else states
+    keywords = FIRE_KEYWORDS if keywords is None else keywords
+    accounts = get_all_fire_accounts() if accounts is None else accounts
+    keyword_group_size = max(1, keyword_group_size)
+    account_group_size = max(1, account_group_size)
+    groups = []
+    for state in states:
+        for i in range(0, len(keywords), keyword_group_size):
+            groups.append(make_group("keyword", keywords[i:i + keyword_group_size], prefix=state))
+    for i in range(0, len(accounts), account_group_size):
+        groups.append(make_group("account", accounts[i:i + account_group_size]))
+    return groups
+
+def split_group(group):
+    terms = group["terms"]
+    middle = len(terms) // 2
+    return [
+        make_group(group["kind"], terms[:middle], group["prefix"]),
+        make_group(group["kind"], terms[middle:], group["prefix"]),
+    ]
+
+class QueryPlan:
+    def __init__(self, groups):
+        self.groups = list(groups)
+        self.flat_loads = sum(len(group["terms"]) for group in self.groups)
+        self.page_loads = 0
+        self.splits = 0
+        self._lock = threading.Lock()
+
+    def record(self, group, stats):
+        # Returns the groups to search next: both halves when the result was
+        # truncated, nothing otherwise
+        with self._lock:
+            self.page_loads += 1
+            if stats is None or stats["stop_reason"] not in TRUNCATED_STOPS or len(group["terms"]) < 2:
+                return []
+            self.splits += 1
+        return split_group(group)
+
+    def report(self, log=print):
+        saved = self.flat_loads - self.page_loads
+        log(f"[INFO] Query plan: {len(self.groups)} planned queries, {self.splits} split after truncation, "
+            f"{self.page_loads} page loads vs {self.flat_loads} for the flat expansion "
+            f"({saved} saved, {saved / max(self.flat_loads, 1):.1%})")
+
+if __name__ == "__main__":
+    groups = plan_queries()
+    for group in groups:
+        print(group_query(group))
+    print(f"{len(groups)} queries instead of {sum(len(g['terms']) for g in groups)} "
+          f"(keyword groups of {KEYWORD_GROUP_SIZE}, account groups of {ACCOUNT_GROUP_SIZE})", file=sys.stderr)
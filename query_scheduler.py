@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import math
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from live_journal import FileLock
+from raw_tweet_store import tweet_key
+
+# Per-query yield history and a UCB1 bandit over it. Each run the crawler
+# orders its queries by expected verified incidents per crawl-minute plus an
+# exploration bonus that grows for queries that have not run in a while, and
+# stops starting new queries once the run's time budget is spent.
+
+YIELD_PATH = os.getenv("QUERY_YIELD_PATH", "output/query_yield.json")
+# Minutes of crawling per run; 0 runs every query
+CRAWL_TIME_BUDGET = float(os.getenv("CRAWL_TIME_BUDGET", "0"))
+# UCB1 exploration constant: higher spends more of the budget on rarely run queries
+SCHEDULER_EXPLORATION = float(os.getenv("SCHEDULER_EXPLORATION", "1.0"))
+# A new tweet counts as this fraction of a verified incident, so queries
+# that have not produced an incident yet are still told apart
+NEW_TWEET_WEIGHT = 0.05
+# Verified tweets are credited to their query once; keys older than this are forgotten
+CREDIT_RETENTION_DAYS = 7
+
+def _empty_state():
+    return {"queries": {}, "credited": {}}
+
+def _empty_entry():
+    return {"runs": 0, "new_tweets": 0, "verified": 0, "seconds": 0.0, "last_run": ""}
+
+def load_yield(path=YIELD_PATH):
+    if not os.path.exists(path):
+        return _empty_state()
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            state = json.load(f)
+        except json.JSONDecodeError:
+            return _empty_state()
+    state.setdefault("queries", {})
+    state.setdefault("credited", {})
+    return state
+
+def _write_yield(state, path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def yield_rate(entry):
+    # Verified incidents (plus weighted new tweets) per crawl-minute
+    reward = entry["verified"] + NEW_TWEET_WEIGHT * entry["new_tweets"]
+    return reward / max(entry["seconds"] / 60.0, 1 / 60.0)
+
+def record_verified_yield(tweets, path=YIELD_PATH):
+    # Called by the verifiers with the tweets the LLM confirmed. Read-modify-write
+    # under the file lock, so it is safe next to a crawler saving the same file.
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=CREDIT_RETENTION_DAYS)).isoformat()
+    credited = 0
+    with FileLock(path):
+        state = load_yield(path)
+        state["credited"] = {k: ts for k, ts in state["credited"].items() if ts >= cutoff}
+        for tweet in tweets:
+            query = tweet.get("search_query")
+            key = tweet_key(tweet)
+            if not query or key in state["credited"]:
+                continue
+            state["credited"][key] = now.isoformat()
+            state["queries"].setdefault(query, _empty_entry())["verified"] += 1
+            credited += 1
+        _write_yield(state, path)
+    return credited
+
+class QueryScheduler:
+    def __init__(self, path=YIELD_PATH, budget_minutes=CRAWL_TIME_BUDGET, exploration=SCHEDULER_EXPLORATION):
+        self.path = path
+        self.budget_seconds = budget_minutes * 60
+        self.exploration = exploration
+        self.history = load_yield(path)["queries"]
+        self.started = time.time()
+        self.skipped = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def score(self, query, total_runs, best_rate):
+        entry = self.history.get(query)
+        if not entry or not entry["runs"]:
+            return math.inf
+        bonus = self.exploration * math.sqrt(math.log(max(total_runs, 1)) / entry["runs"])
+        return yield_rate(entry) / best_rate + bonus
+
+    def order(self, items):
+        # items are crawl tuples with the query string first; never-run queries
+        # come first, then by UCB score. sorted() keeps plan order for ties.
+        total_runs = sum(entry["runs"] for entry in self.history.values())
+        best_rate = max((yield_rate(e) for e in self.history.values() if e["runs"]), default=0.0) or 1.0
+        scores = {item[0]: self.score(item[0], total_runs, best_rate) for item in items}
+        return sorted(items, key=lambda item: -scores[item[0]])
+
+    def out_of_time(self):
+        return bool(self.budget_seconds) and time.time() - self.started >= self.budget_seconds
+
+    def skip(self, count=1):
+        with self._lock:
+            self.skipped += count
+
+    def record_crawl(self, query, stats):
+        if stats is None:
+            return
+        with self._lock:
+            entry = self._pending.setdefault(query, _empty_entry())
+            entry["runs"] += 1
+            # Tweets the raw store accepted, i.e. not seen by an earlier search
+            entry["new_tweets"] += stats["new_tweets"]
+            entry["seconds"] += stats["elapsed"]
+
+    def save(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        with FileLock(self.path):
+            state = load_yield(self.path)
+            for query, delta in pending.items():
+                entry = state["queries"].setdefault(query, _empty_entry())
+                entry["runs"] += delta["runs"]
+                entry["new_tweets"] += delta["new_tweets"]
+                entry["seconds"] = round(entry["seconds"] + delta["seconds"], 2)
+                entry["last_run"] = now
+            _write_yield(state, self.path)
+        self.history = state["queries"]
+
+    def report(self, log=print):
+        elapsed = (time.time() - self.started) / 60.0
+        budget = f"{self.budget_seconds / 60.0:.0f} min budget" if self.budget_seconds else "no time budget"
+        log(f"[INFO] Scheduler: {elapsed:.1f} crawl-minutes ({budget}), {self.skipped} queries skipped for time")
+
+if __name__ == "__main__":
+    state = load_yield()
+    entries = sorted(state["queries"].items(), key=lambda item: -yield_rate(item[1]))
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    print(f"{'rate/min':>9} {'verified':>8} {'new':>6} {'runs':>5} {'sec':>8}  query")
+    for query, entry in entries[:limit]:
+        print(f"{yield_rate(entry):9.3f} {entry['verified']:8d} {entry['new_tweets']:6d} {entry['runs']:5d} {entry['seconds']:8.1f}  {query}")
+    print(f"{len(entries)} queries with yield history in {YIELD_PATH}")
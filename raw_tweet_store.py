@@ -0,0 +1,177 @@
+import os
+import json
+import hashlib
+
+# Append-only raw tweet store: one JSON object per line in a .jsonl file, plus a
+# sidecar .idx file holding one dedup hash per line so the index survives runs.
+# The tweet line is written before its key, so on open the last lines of the
+# store are checked against the index to recover a key lost to a crash.
+
+# Bytes at the end of the store re-checked against the index on open
+INDEX_CHECK_TAIL_BYTES = 64 * 1024
+
+def tweet_key(tweet):
+    raw = json.dumps(
+        [tweet.get("username"), tweet.get("timestamp"), tweet.get("content")],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _end_with_newline(path):
+    # A crash mid-write leaves a partial last line; start the next one on a
+    # fresh line so it is not glued to it (readers skip the partial line)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+def _tail_lines(path, max_bytes):
+    # Complete lines among the last max_bytes of the file
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        lines = f.read().split(b"\n")
+    if size > max_bytes:
+        # The first line is probably cut
+        lines = lines[1:]
+    return lines
+
+def iter_jsonl(path):
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write can leave a truncated last line; skip it
+                continue
+
+class RawTweetStore:
+    def __init__(self, jsonl_path, legacy_json_path=None):
+        self.jsonl_path = jsonl_path
+        self.index_path = os.path.splitext(jsonl_path)[0] + ".idx"
+        self.legacy_json_path = legacy_json_path
+        self._keys = None
+        self._file = None
+        self._index_file = None
+
+    def _load_index(self):
+        keys = set()
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                keys.update(line.strip() for line in f if line.strip())
+        else:
+            # Index missing (first run or deleted): rebuild it from the store
+            for tweet in iter_jsonl(self.jsonl_path):
+                keys.add(tweet_key(tweet))
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                for key in keys:
+                    f.write(key + "\n")
+        self._keys = keys
+
+    def _recover_tail_keys(self):
+        # Keys of the store's last tweets that never made it into the index
+        if not os.path.exists(self.jsonl_path):
+            return []
+        missing = []
+        for line in _tail_lines(self.jsonl_path, INDEX_CHECK_TAIL_BYTES):
+            try:
+                key = tweet_key(json.loads(line))
+            except (ValueError, AttributeError):
+                continue
+            if key not in self._keys:
+                self._keys.add(key)
+                missing.append(key)
+        return missing
+
+    def _open(self):
+        if self._keys is not None:
+            return
+        _end_with_newline(self.jsonl_path)
+        _end_with_newline(self.index_path)
+        self._load_index()
+        missing = self._recover_tail_keys()
+        self._file = open(self.jsonl_path, "a", encoding="utf-8")
+        self._index_file = open(self.index_path, "a", encoding="utf-8")
+        if missing:
+            self._index_file.write("".join(key + "\n" for key in missing))
+            self._index_file.flush()
+        self._import_legacy_json()
+
+    def _import_legacy_json(self):
+        # One-time migration of a pre-existing JSON array raw file for the same day
+        path = self.legacy_json_path
+        if not path or not os.path.exists(path) or os.path.getsize(self.jsonl_path) > 0:
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                tweets = json.load(f)
+            except json.JSONDecodeError:
+                return
+        for tweet in tweets:
+            self.add(tweet)
+
+    def __contains__(self, tweet):
+        self._open()
+        return tweet_key(tweet) in self._keys
+
+    def __len__(self):
+        self._open()
+        return len(self._keys)
+
+    def add(self, tweet):
+        self._open()
+        key = tweet_key(tweet)
+        if key in self._keys:
+            return False
+        self._file.write(json.dumps(tweet, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._index_file.write(key + "\n")
+        self._index_file.flush()
+        self._keys.add(key)
+        return True
+
+    def __iter__(self):
+        if self._file is not None:
+            self._file.flush()
+        return iter_jsonl(self.jsonl_path)
+
+    def export_json(self, json_path):
+        # Stream the store into the JSON array layout downstream scripts expect
+        tmp_path = json_path + ".tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for tweet in self:
+                f.write(",\n" if count else "\n")
+                body = json.dumps(tweet, indent=4, ensure_ascii=False)
+                f.write("    " + body.replace("\n", "\n    "))
+                count += 1
+            f.write("\n]" if count else "]")
+        os.replace(tmp_path, json_path)
+        return count
+
+    def close(self):
+        for handle in (self._file, self._index_file):
+            if handle is not None:
+                handle.close()
+        self._file = None
+        self._index_file = None
+        self._keys = None
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("Usage: python raw_tweet_store.py <tweets_raw.jsonl> <tweets_raw.json>")
+        exit(1)
+    store = RawTweetStore(sys.argv[1])
+    exported = store.export_json(sys.argv[2])
+    store.close()
+    print(f"Exported {exported} tweets from {sys.argv[1]} to {sys.argv[2]}")
@@ -0,0 +1,54 @@
+import os
+from datetime import datetime
+from live_journal import append_entry, read_entries
+
+# Durable progress log for a crawl or verification run. The first line holds
+# the run's settings, every later line one finished unit of work, each
+# fsync'd on append. A resumed run reads it back and skips that work.
+
+CHECKPOINT_DIR = "output/checkpoints"
+
+def checkpoint_path(name):
+    return os.path.join(CHECKPOINT_DIR, f"{name}.jsonl")
+
+class RunCheckpoint:
+    def __init__(self, path, resume=False, meta=None):
+        self.path = path
+        self.entries = []
+        self.resumed = False
+        if resume and os.path.exists(path):
+            entries, _ = read_entries(path)
+            if entries and "meta" in entries[0]:
+                self.meta = entries[0]["meta"]
+                self.entries = entries[1:]
+                self.resumed = True
+                return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+        self.meta = dict(meta or {}, started=datetime.now().isoformat())
+        append_entry(path, {"meta": self.meta})
+
+    @property
+    def finished(self):
+        return any(entry.get("finished") for entry in self.entries)
+
+    def record(self, entry):
+        append_entry(self.path, entry)
+        self.entries.append(entry)
+
+    def finish(self):
+        self.record({"finished": datetime.now().isoformat()})
+
+if __name__ == "__main__":
+    # Shows what a --resume run would pick up
+    if not os.path.isdir(CHECKPOINT_DIR):
+        print(f"No checkpoints in {CHECKPOINT_DIR}")
+        exit(0)
+    for file_name in sorted(os.listdir(CHECKPOINT_DIR)):
+        if not file_name.endswith(".jsonl"):
+            continue
+        entries, _ = read_entries(os.path.join(CHECKPOINT_DIR, file_name))
+        meta = entries[0].get("meta", {}) if entries else {}
+        state = "finished" if any(entry.get("finished") for entry in entries) else "resumable"
+        print(f"{file_name}: {max(len(entries) - 1, 0)} done, {state}, started {meta.get('started', '?')}")
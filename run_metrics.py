@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import time
+import atexit
+import random
+import cProfile
+import pstats
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Per-stage timers and counters for the crawler and the verifiers. Stage
+# timings and events go to a buffered JSONL log, a run summary (count, total,
+# p50/p95/max per stage, token counts) is written as JSON at the end, an
+# optional HTTP endpoint serves the same numbers in Prometheus text format,
+# and chosen stages can run under cProfile.
+
+METRICS_DIR = os.getenv("METRICS_DIR", "output/metrics")
+# Port for the Prometheus-format /metrics endpoint; 0 leaves it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Comma-separated stage names to run under cProfile, or "all"
+PROFILE_STAGES = {name.strip() for name in os.getenv("PROFILE_STAGES", "").split(",") if name.strip()}
+PROFILE_DIR = os.getenv("PROFILE_DIR", "output/profiles")
+# Buffered sinks write after this many lines or seconds, whichever comes first
+LOG_FLUSH_LINES = 200
+LOG_FLUSH_SECONDS = 2.0
+# Samples kept per stage for the percentiles (reservoir beyond that)
+TIMER_SAMPLES = 10000
+RUN_ID = datetime.now().strftime("%d%b_%H%M%S").lower()
+
+class BufferedLog:
+    # Appends lines to a file in batches instead of reopening it per message
+    def __init__(self, path, flush_lines=LOG_FLUSH_LINES, flush_seconds=LOG_FLUSH_SECONDS):
+        # Absolute, so the exit-time flush lands where it would have at startup
+        # even if the working directory changed since
+        self.path = os.path.abspath(path)
+        self.flush_lines = flush_lines
+        self.flush_seconds = flush_seconds
+        self._lines = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def write(self, line):
+        with self._lock:
+            self._lines.append(line)
+            if len(self._lines) < self.flush_lines and time.time() - self._last_flush < self.flush_seconds:
+                return
+            self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def set_path(self, path):
+        # Lines buffered so far still go to the old file
+        with self._lock:
+            self._flush_locked()
+            self.path = os.path.abspath(path)
+
+    def _flush_locked(self):
+        self._last_flush = time.time()
+        if not self._lines:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._lines) + "\n")
+        self._lines = []
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class RunMetrics:
+    def __init__(self, events_path=None):
+        self.events = BufferedLog(events_path or os.path.join(METRICS_DIR, f"events_{RUN_ID}.jsonl"))
+        self.started = time.time()
+        self.counters = {}
+        self.timers = {}
+        self._profiles = {}
+        self._lock = threading.Lock()
+        # cProfile cannot run two profilers at once on newer Pythons
+        self._profiling = threading.Lock()
+        self._server = None
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0, "samples": []})
+            timer["count"] += 1
+            timer["total"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+            if len(timer["samples"]) < TIMER_SAMPLES:
+                timer["samples"].append(seconds)
+            else:
+                slot = random.randrange(timer["count"])
+                if slot < TIMER_SAMPLES:
+                    timer["samples"][slot] = seconds
+
+    def event(self, kind, **fields):
+        fields = dict(fields, event=kind, ts=round(time.time(), 3))
+        self.events.write(json.dumps(fields, ensure_ascii=False, default=str))
+
+    @contextmanager
+    def timer(self, stage, **fields):
+        # Times the block as `stage`; with fields, also logs one event for it
+        profile = None
+        if (stage in PROFILE_STAGES or "all" in PROFILE_STAGES) and self._profiling.acquire(blocking=False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                self._profiling.release()
+                profile = None
+        started = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            seconds = time.perf_counter() - started
+            if profile:
+                profile.disable()
+                self._profiling.release()
+                with self._lock:
+                    self._profiles.setdefault(stage, []).append(profile)
+            self.observe(stage, seconds)
+            if fields:
+                self.event(stage, seconds=round(seconds, 4), **fields)
+
+    def record_openai_call(self, kind, seconds, usage=None, error=None):
+        self.observe(f"openai.{kind}", seconds)
+        if error is not None:
+            self.incr("openai.errors")
+            self.event(f"openai.{kind}", seconds=round(seconds, 4), error=str(error)[:200])
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        # Prompt tokens served from the provider's prefix cache
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        self.incr("openai.calls")
+        self.incr("openai.prompt_tokens", prompt_tokens)
+        self.incr("openai.cached_prompt_tokens", cached_tokens)
+        self.incr("openai.completion_tokens", completion_tokens)
+        self.event(f"openai.{kind}", seconds=round(seconds, 4), prompt_tokens=prompt_tokens,
+                   cached_tokens=cached_tokens, completion_tokens=completion_tokens)
+
+    def summary(self):
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": timer["count"],
+                    "total_s": round(timer["total"], 3),
+                    "mean_ms": round(1000 * timer["total"] / timer["count"], 3),
+                    "p50_ms": round(1000 * _percentile(timer["samples"], 0.50), 3),
+                    "p95_ms": round(1000 * _percentile(timer["samples"], 0.95), 3),
+                    "max_ms": round(1000 * timer["max"], 3),
+                }
+                for stage, timer in self.timers.items()
+            }
+            counters = dict(self.counters)
+        return {"run_id": RUN_ID, "elapsed_s": round(time.time() - self.started, 3), "stages": stages, "counters": counters}
+
+    def write_summary(self, path=None, log=print):
+        summary = self.summary()
+        path = path or os.path.join(METRICS_DIR, f"run_{RUN_ID}.json")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        self.events.flush()
+        for stage, timer in sorted(summary["stages"].items(), key=lambda item: -item[1]["total_s"]):
+            log(f"[TIMING] {stage}: {timer['count']}x, {timer['total_s']:.1f}s total, "
+                f"p50 {timer['p50_ms']:.1f} ms, p95 {timer['p95_ms']:.1f} ms, max {timer['max_ms']:.1f} ms")
+        if summary["counters"]:
+            log(f"[INFO] Counters: " + ", ".join(f"{name}={value}" for name, value in sorted(summary["counters"].items())))
+        log(f"[INFO] Run metrics saved to {path}")
+        self.dump_profiles(log)
+        return path
+
+    def dump_profiles(self, log=print):
+        with self._lock:
+            profiles, self._profiles = self._profiles, {}
+        for stage, runs in profiles.items():
+            stats = pstats.Stats(runs[0])
+            for profile in runs[1:]:
+                stats.add(profile)
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{stage}_{RUN_ID}.prof")
+            stats.dump_stats(path)
+            log(f"[INFO] cProfile for {stage} ({len(runs)} runs) saved to {path}")
+
+    def prometheus_text(self):
+        summary = self.summary()
+        lines = [
+            "# TYPE fire_crawler_stage_seconds summary",
+        ]
+        for stage, timer in sorted(summary["stages"].items()):
+            label = f'stage="{stage}"'
+            lines.append(f'fire_crawler_stage_seconds{{{label},quantile="0.5"}} {timer["p50_ms"] / 1000:.6g}')
+            lines.append(f'fire_crawler_stage_seconds{{{label},quantile="0.95"}} {timer["p95_ms"] / 1000:.6g}')
+            lines.append(f"fire_crawler_stage_seconds_sum{{{label}}} {timer['total_s']}")
+            lines.append(f"fire_crawler_stage_seconds_count{{{label}}} {timer['count']}")
+        lines.append("# TYPE fire_crawler_events_total counter")
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f'fire_crawler_events_total{{name="{name}"}} {value}')
+        lines.append("# TYPE fire_crawler_run_seconds gauge")
+        lines.append(f"fire_crawler_run_seconds {summary['elapsed_s']}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT):
+        if not port or self._server is not None:
+            return None
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"[INFO] Prometheus metrics on http://localhost:{port}/metrics")
+        return self._server
+
+METRICS = RunMetrics()
+
+def timed_completion(client, kind, **request):
+    # client.chat.completions.create with latency and token usage recorded
+    started = time.perf_counter()
+    try:
+        response = client.chat.completions.create(**request)
+    except Exception as e:
+        METRICS.record_openai_call(kind, time.perf_counter() - started, error=e)
+        raise
+    METRICS.record_openai_call(kind, time.perf_counter() - started, getattr(response, "usage", None))
+    return response
+
+if __name__ == "__main__":
+    # python run_metrics.py [run_summary.json]: print a saved run summary, latest by default
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        runs = sorted(f for f in os.listdir(METRICS_DIR) if f.startswith("run_")) if os.path.isdir(METRICS_DIR) else []
+        if not runs:
+            print(f"No run summaries in {METRICS_DIR}")
+            exit(1)
+        path = max((os.path.join(METRICS_DIR, f) for f in runs), key=os.path.getmtime)
+    with open(path, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    print(f"Run {summary['run_id']}: {summary['elapsed_s']:.1f}s")
+    print(f"{'stage':<24} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage, timer in sorted(summary["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        print(f"{stage:<24} {timer['count']:7d} {timer['total_s']:9.2f} {timer['p50_ms']:9.2f} {timer['p95_ms']:9.2f} {timer['max_ms']:9.2f}")
+    for name, value in sorted(summary["counters"].items()):
+        print(f"{name}: {value}")
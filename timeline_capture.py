@@ -0,0 +1,182 @@
+import os
+import json
+import html
+from datetime import datetime
+
+# Network capture mode for the crawler: instead of reading rendered articles,
+# read the SearchTimeline GraphQL responses the search page already fetches,
+# via Chrome's performance log and the DevTools Network domain.
+
+TIMELINE_URL_MARKERS = ("/SearchTimeline",)
+
+def enable_performance_logging(chrome_options):
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+def _format_created_at(created_at):
+    # "Wed Jul 23 19:44:27 +0000 2025" -> "2025-07-23T19:44:27.000Z" (the DOM <time> format)
+    try:
+        parsed = datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
+    except (TypeError, ValueError):
+        return created_at
+    return parsed.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def _tweet_text(result, legacy):
+    note = result.get("note_tweet", {}).get("note_tweet_results", {}).get("result", {})
+    if note.get("text"):
+        return note["text"]
+    # display_text_range counts code points of the unescaped text
+    text = html.unescape(legacy.get("full_text", ""))
+    text_range = legacy.get("display_text_range")
+    if text_range and len(text_range) == 2:
+        # Drops the leading @reply handles and trailing media t.co link, as rendered
+        text = text[text_range[0]:text_range[1]]
+    for url in legacy.get("entities", {}).get("urls", []):
+        if url.get("url") and url.get("expanded_url"):
+            text = text.replace(url["url"], url["expanded_url"])
+    return text
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def parse_tweet_result(result, query):
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        result = result.get("tweet", {})
+    legacy = result.get("legacy")
+    if not legacy:
+        # Tombstones and unavailable tweets carry no legacy block
+        return None
+    user = result.get("core", {}).get("user_results", {}).get("result", {})
+    user_core = user.get("core", {})
+    user_legacy = user.get("legacy", {})
+    username = user_core.get("name") or user_legacy.get("name", "")
+    screen_name = user_core.get("screen_name") or user_legacy.get("screen_name", "")
+    tweet_id = result.get("rest_id") or legacy.get("id_str", "")
+    media_entities = (legacy.get("extended_entities") or legacy.get("entities") or {}).get("media", [])
+    return {
+        "username": username,
+        "content": _tweet_text(result, legacy),
+        "timestamp": _format_created_at(legacy.get("created_at")),
+        "tweet_url": f"https://x.com/{screen_name}/status/{tweet_id}" if screen_name and tweet_id else "URL Not Found",
+        "retweets": _to_int(legacy.get("retweet_count")),
+        "likes": _to_int(legacy.get("favorite_count")),
+        "media": [m["media_url_https"] for m in media_entities if m.get("media_url_https")],
+        "search_query": query,
+        "source_account": username,
+        "tweet_id": tweet_id,
+        "screen_name": screen_name
+    }
+
+def _iter_item_contents(node):
+    if isinstance(node, dict):
+        if "tweet_results" in node:
+            yield node
+            return
+        for value in node.values():
+            yield from _iter_item_contents(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_item_contents(value)
+
+def parse_timeline_response(payload, query):
+    # Walks every entry layout (TimelineAddEntries, modules, replace entries)
+    # looking for itemContent blocks; promoted tweets are skipped.
+    tweets = []
+    seen_ids = set()
+    for item in _iter_item_contents(payload):
+        if item.get("promotedMetadata"):
+            continue
+        tweet = parse_tweet_result(item["tweet_results"].get("result", {}), query)
+        if tweet is None or tweet["tweet_id"] in seen_ids:
+            continue
+        seen_ids.add(tweet["tweet_id"])
+        tweets.append(tweet)
+    return tweets
+
+class TimelineCapture:
+    def __init__(self, driver, url_markers=TIMELINE_URL_MARKERS):
+        self.driver = driver
+        self.url_markers = url_markers
+        self._pending = set()
+
+    def reset(self):
+        # Drain log entries left over from the previous page
+        self.driver.get_log("performance")
+        self._pending.clear()
+
+    def collect(self, query):
+        finished = set()
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                if any(marker in url for marker in self.url_markers):
+                    self._pending.add(params.get("requestId"))
+            elif method == "Network.loadingFinished":
+                finished.add(params.get("requestId"))
+        tweets = []
+        # Bodies are only retrievable once loading has finished; the rest stay
+        # pending until a later collect() sees their loadingFinished event.
+        for request_id in sorted(self._pending & finished):
+            self._pending.discard(request_id)
+            try:
+                response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                payload = json.loads(response.get("body", ""))
+            except Exception as e:
+                print(f"⚠️ Skipping timeline response {request_id}: {e}")
+                continue
+            tweets.extend(parse_timeline_response(payload, query))
+        return tweets
+
+# Saved SearchTimeline body covering a plain tweet, a TweetWithVisibilityResults
+# wrapper, a promoted entry, a note_tweet, a tombstone and cursor entries
+SAMPLE_RESPONSE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "search_timeline_sample.json")
+SAMPLE_EXPECTED = [
+    {"tweet_id": "1948100000000000001", "timestamp": "2025-07-23T19:44:27.000Z", "retweets": 12, "likes": 48,
+     "content": "Crews on scene of a 2-alarm apartment fire in Houston & 40 units evacuated https://houstontx.gov/fire/incident"},
+    {"tweet_id": "1948100000000000002", "timestamp": "2025-07-24T02:05:09.000Z", "retweets": 7, "likes": 21,
+     "content": "House fire in Oakland destroys two homes, no injuries reported"},
+    {"tweet_id": "1948100000000000003", "timestamp": "2025-07-24T06:30:00.000Z", "retweets": 30, "likes": 0,
+     "content": "Update on the commercial fire at 35th Ave and Thomas: the warehouse roof has collapsed and crews have moved to a defensive attack. Adjacent businesses were evacuated as a precaution and no injuries are reported. Avoid the area while crews remain on scene overnight."},
+]
+
+def check_sample(path=SAMPLE_RESPONSE):
+    with open(path, "r", encoding="utf-8") as f:
+        tweets = parse_timeline_response(json.load(f), query="sample")
+    assert [t["tweet_id"] for t in tweets] == [e["tweet_id"] for e in SAMPLE_EXPECTED], [t["tweet_id"] for t in tweets]
+    for tweet, expected in zip(tweets, SAMPLE_EXPECTED):
+        for field, value in expected.items():
+            assert tweet[field] == value, (tweet["tweet_id"], field, tweet[field])
+        assert type(tweet["retweets"]) is int and type(tweet["likes"]) is int, tweet["tweet_id"]
+    assert tweets[0]["media"] == ["https://pbs.twimg.com/media/GwFire1.jpg", "https://pbs.twimg.com/media/GwFire2.jpg"]
+    assert tweets[0]["tweet_url"] == "https://x.com/HoustonFire/status/1948100000000000001"
+    assert tweets[1]["username"] == "Oakland News" and tweets[1]["screen_name"] == "OaklandNews"
+    return tweets
+
+if __name__ == "__main__":
+    import sys
+    # Offline check against saved SearchTimeline response bodies;
+    # "check" parses the bundled sample and asserts the expected fields
+    if len(sys.argv) < 2:
+        print("Usage: python timeline_capture.py check")
+        print("       python timeline_capture.py <response.json> [<response.json> ...]")
+        exit(1)
+    if sys.argv[1] == "check":
+        tweets = check_sample()
+        print(f"OK: {len(tweets)} tweets parsed from {SAMPLE_RESPONSE} as expected")
+        exit(0)
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        tweets = parse_timeline_response(payload, query=path)
+        print(f"{path}: {len(tweets)} tweets")
+        for tweet in tweets:
+            print(f"  {tweet['tweet_id']} {tweet['timestamp']} @{tweet['screen_name']} "
+                  f"RT={tweet['retweets']} Likes={tweet['likes']} {tweet['content'][:60]!r}")
@@ -0,0 +1,178 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from raw_tweet_store import tweet_key
+from tweet_filter import parse_tweet_time
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+# Columnar archive for raw tweets and verified rows: one Parquet file per
+# crawl day (or incident partition), rows sorted by publish time, with
+# dictionary-encoded account/query columns and compressed text. Readers
+# project only the columns they need and push the time window down to the
+# row-group statistics, so scanning months of history reads a small part
+# of the files. Needs pyarrow; everything else in the pipeline runs without it.
+
+ARCHIVE_DIR = os.getenv("TWEET_ARCHIVE_DIR", "output/archive")
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+# Small enough that a 72h window skips most of a day file's row groups
+ARCHIVE_ROW_GROUP_SIZE = 10000
+# Parsed timestamp/published_date column the time predicates run against
+PUBLISHED_COLUMN = "published"
+
+def _schemas():
+    return {
+        "raw": pa.schema([
+            ("username", pa.string()), ("content", pa.string()), ("timestamp", pa.string()),
+            ("tweet_url", pa.string()), ("retweets", pa.string()), ("likes", pa.string()),
+            ("media", pa.list_(pa.string())), ("search_query", pa.string()), ("source_account", pa.string()),
+            # Only set by the network capture mode
+            ("tweet_id", pa.string()), ("screen_name", pa.string()),
+        ]),
+        "verified": pa.schema([
+            ("title", pa.string()), ("content", pa.string()), ("published_date", pa.string()),
+            ("url", pa.string()), ("source", pa.string()), ("fire_related_score", pa.int64()),
+            ("verification_result", pa.string()), ("verified_at", pa.string()),
+        ]),
+    }
+
+# Low-cardinality columns stored as dictionaries
+DICTIONARY_COLUMNS = {
+    "raw": ["username", "search_query", "source_account"],
+    "verified": ["source", "verification_result"],
+}
+TIME_FIELDS = {"raw": "timestamp", "verified": "published_date"}
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("The Parquet archive needs pyarrow (pip install pyarrow)")
+
+def archive_path(kind, name, root=ARCHIVE_DIR):
+    return os.path.join(root, kind, f"{name}.parquet")
+
+def rows_to_table(rows, kind):
+    require_pyarrow()
+    schema = _schemas()[kind]
+    time_field = TIME_FIELDS[kind]
+    published = [parse_tweet_time(row.get(time_field, "")) for row in rows]
+    # Sorted by publish time so each row group covers a narrow time range;
+    # rows without a timestamp go last
+    order = sorted(range(len(rows)), key=lambda i: (published[i] is None, published[i] or datetime.min.replace(tzinfo=timezone.utc)))
+    columns = {}
+    for field in schema:
+        values = [rows[i].get(field.name) for i in order]
+        if field.name == "fire_related_score":
+            values = [int(v) if isinstance(v, (int, float)) or str(v).isdigit() else None for v in values]
+        elif pa.types.is_string(field.type):
+            values = [None if v is None else str(v) for v in values]
+        columns[field.name] = pa.array(values, type=field.type)
+    columns[PUBLISHED_COLUMN] = pa.array([published[i] for i in order], type=pa.timestamp("ms", tz="UTC"))
+    return pa.table(columns)
+
+def write_archive(rows, path, kind="raw"):
+    table = rows_to_table(list(rows), kind)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    pq.write_table(
+        table, tmp_path,
+        compression=ARCHIVE_COMPRESSION,
+        use_dictionary=DICTIONARY_COLUMNS[kind],
+        row_group_size=ARCHIVE_ROW_GROUP_SIZE,
+        write_statistics=True,
+    )
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+def _dataset(source, exclude=None):
+    # source: a .parquet file, a directory of them, or a list of files
+    require_pyarrow()
+    if isinstance(source, str) and os.path.isdir(source):
+        files = sorted(os.path.join(source, f) for f in os.listdir(source) if f.endswith(".parquet"))
+    elif isinstance(source, str):
+        files = [source] if os.path.exists(source) else []
+    else:
+        files = list(source)
+    if exclude:
+        files = [f for f in files if os.path.abspath(f) != os.path.abspath(exclude)]
+    if not files:
+        return None
+    # Files written before a column was added read it as null
+    schema = pa.unify_schemas([pq.read_schema(f) for f in files])
+    return ds.dataset(files, schema=schema, format="parquet")
+
+def _time_filter(since=None, until=None):
+    expression = None
+    column = ds.field(PUBLISHED_COLUMN)
+    if since is not None:
+        expression = column >= pa.scalar(since, type=pa.timestamp("ms", tz="UTC"))
+    if until is not None:
+        bound = column < pa.scalar(until, type=pa.timestamp("ms", tz="UTC"))
+        expression = bound if expression is None else expression & bound
+    return expression
+
+def read_archive(source, columns=None, since=None, until=None, exclude=None):
+    # Table of the projected columns for since <= published < until
+    dataset = _dataset(source, exclude)
+    if dataset is None:
+        return None
+    return dataset.to_table(columns=columns, filter=_time_filter(since, until))
+
+def iter_archive(source, columns=None, since=None, until=None, batch_size=ARCHIVE_ROW_GROUP_SIZE):
+    # Row dicts in the original JSON shape, one record batch in memory at a time
+    dataset = _dataset(source)
+    if dataset is None:
+        return
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != PUBLISHED_COLUMN]
+    for batch in dataset.to_batches(columns=columns, filter=_time_filter(since, until), batch_size=batch_size):
+        yield from batch.to_pylist()
+
+def archive_keys(source, since=None, until=None, exclude=None):
+    # tweet_key of every archived raw tweet in the window, reading only the key columns
+    table = read_archive(source, ["username", "timestamp", "content"], since, until, exclude)
+    if table is None:
+        return set()
+    return {tweet_key(row) for row in table.to_pylist()}
+
+def archive_raw_tweets(tweets, name, root=ARCHIVE_DIR):
+    # Writes one crawl day to <root>/raw/<name>.parquet, dropping tweets an
+    # earlier day already archived (the 72h search window re-finds them daily)
+    path = archive_path("raw", name, root)
+    tweets = list(tweets)
+    times = [t for t in (parse_tweet_time(tweet.get("timestamp", "")) for tweet in tweets) if t is not None]
+    seen = set()
+    if times:
+        seen = archive_keys(os.path.join(root, "raw"), min(times), max(times) + timedelta(milliseconds=1), exclude=path)
+    fresh = [tweet for tweet in tweets if tweet_key(tweet) not in seen]
+    write_archive(fresh, path, "raw")
+    return len(fresh), len(tweets) - len(fresh)
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "import" and len(sys.argv) > 2:
+        # python tweet_archive.py import 25jul_tweets_raw.jsonl [2025-07-25]
+        from tweet_filter import iter_tweets
+        source = sys.argv[2]
+        name = sys.argv[3] if len(sys.argv) > 3 else datetime.fromtimestamp(os.path.getmtime(source)).strftime("%Y-%m-%d")
+        written, duplicates = archive_raw_tweets(iter_tweets(source), name)
+        path = archive_path("raw", name)
+        print(f"Archived {written} tweets ({duplicates} already archived) to {path}: "
+              f"{os.path.getsize(path) / 1024:.0f} KB vs {os.path.getsize(source) / 1024:.0f} KB source")
+    elif command == "scan":
+        # python tweet_archive.py scan [hours]: recent tweets per account, timestamp/username columns only
+        hours = float(sys.argv[2]) if len(sys.argv) > 2 else 72
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        table = read_archive(os.path.join(ARCHIVE_DIR, "raw"), ["username"], since=since)
+        counts = table.group_by("username").aggregate([("username", "count")]).sort_by([("username_count", "descending")]) if table is not None else None
+        for row in (counts.to_pylist()[:20] if counts is not None else []):
+            print(f"{row['username_count']:6d}  {row['username']}")
+        print(f"{table.num_rows if table is not None else 0} archived tweets in the last {hours:g} hours")
+    else:
+        print("Usage: python tweet_archive.py import <tweets_raw.json|.jsonl> [YYYY-MM-DD]")
+        print("       python tweet_archive.py scan [hours]")
+        exit(1)
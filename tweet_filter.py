@@ -0,0 +1,142 @@
+import os
+import json
+from datetime import datetime, timedelta, timezone
+from raw_tweet_store import iter_jsonl
+
+# Streaming recency/length filter shared by tweet_fire_search and
+# ai_fire_verifier_72h. Tweets are read one at a time from the JSONL raw store,
+# a JSON array file or a Parquet archive and written out as they are accepted,
+# so memory stays flat however large the raw archive grows.
+
+# Log one [DEBUG] line per this many tweets; the rest are only counted
+FILTER_DEBUG_SAMPLE = int(os.getenv("FILTER_DEBUG_SAMPLE", "500"))
+# Also drop tweets without a fire keyword plus damage or US place (keyword_matcher)
+RELEVANCE_FILTER = os.getenv("RELEVANCE_FILTER", "0") == "1"
+
+def parse_tweet_time(ts):
+    try:
+        tweet_time = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if tweet_time.tzinfo is None:
+        tweet_time = tweet_time.replace(tzinfo=timezone.utc)
+    return tweet_time
+
+def is_within_hours(ts, hours=72, now=None):
+    tweet_time = parse_tweet_time(ts)
+    if tweet_time is None:
+        return False
+    now = now or datetime.now(timezone.utc)
+    return (now - tweet_time).total_seconds() <= hours * 3600
+
+def iter_json_array(path, chunk_size=1 << 16):
+    # Incremental reader for a top-level JSON array of objects
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip("\ufeff \t\r\n")
+        if not buffer:
+            return
+        if buffer[0] != "[":
+            raise ValueError(f"{path} is not a JSON array")
+        pos = 1
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                more = f.read(chunk_size)
+                if not more:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                buffer, pos = more, 0
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield item
+            pos = end
+            if pos > chunk_size:
+                buffer, pos = buffer[pos:], 0
+
+def iter_tweets(path, since=None):
+    # `since` is pushed down to Parquet archives (a file or a directory of
+    # them); the JSON formats are read in full and filtered by the caller
+    if path.endswith(".parquet") or os.path.isdir(path):
+        from tweet_archive import iter_archive
+        return iter_archive(path, since=since)
+    if path.endswith(".jsonl"):
+        return iter_jsonl(path)
+    return iter_json_array(path)
+
+class JsonArrayWriter:
+    # Writes a JSON array one item at a time (same layout as json.dump(indent=4))
+    # into a temp file that replaces `path` on close
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.count = 0
+        self._file = open(self.tmp_path, "w", encoding="utf-8")
+        self._file.write("[")
+
+    def write(self, item):
+        self._file.write(",\n" if self.count else "\n")
+        body = json.dumps(item, indent=4, ensure_ascii=False)
+        self._file.write("    " + body.replace("\n", "\n    "))
+        self.count += 1
+
+    def close(self):
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self.tmp_path)
+
+def classify_tweet(tweet, hours=72, min_length=30, now=None, relevant_only=RELEVANCE_FILTER):
+    # Returns "accepted", "too_old", "too_short", "not_relevant" or "bad_timestamp"
+    tweet_time = parse_tweet_time(tweet.get("timestamp", ""))
+    if tweet_time is None:
+        return "bad_timestamp"
+    now = now or datetime.now(timezone.utc)
+    if (now - tweet_time).total_seconds() > hours * 3600:
+        return "too_old"
+    if len(tweet.get("content", "").strip()) < min_length:
+        return "too_short"
+    if relevant_only:
+        from keyword_matcher import match_tweet, is_relevant_match
+        if not is_relevant_match(match_tweet(tweet.get("content", ""))):
+            return "not_relevant"
+    return "accepted"
+
+def filter_tweets_stream(input_path, output_path, hours=72, min_length=30, now=None, debug_every=FILTER_DEBUG_SAMPLE, log=print):
+    now = now or datetime.now(timezone.utc)
+    stats = {"read": 0, "accepted": 0, "too_old": 0, "too_short": 0, "not_relevant": 0, "bad_timestamp": 0}
+    with JsonArrayWriter(output_path) as writer:
+        for tweet in iter_tweets(input_path, since=now - timedelta(hours=hours)):
+            stats["read"] += 1
+            ts = tweet.get("timestamp", "")
+            result = classify_tweet(tweet, hours, min_length, now)
+            stats[result] += 1
+            if result == "bad_timestamp":
+                if stats["bad_timestamp"] <= 5:
+                    log(f"[DEBUG] Error parsing timestamp '{ts}'")
+                continue
+            if debug_every and (stats["read"] - 1) % debug_every == 0:
+                log(f"[DEBUG] Sample tweet #{stats['read']}: timestamp: {ts} | Now: {now.isoformat()} | Within {hours}h: {result != 'too_old'} | Content length: {len(tweet.get('content', '').strip())} | Result: {result}")
+            if result == "accepted":
+                writer.write(tweet)
+    log(f"[DEBUG] Filter summary: read {stats['read']} | accepted {stats['accepted']} | older than {hours}h {stats['too_old']} | "
+        f"shorter than {min_length} chars {stats['too_short']} | not relevant {stats['not_relevant']} | bad timestamp {stats['bad_timestamp']}")
+    return stats
@@ -1,18 +1,29 @@
 import os
-import json
 import time
 import random
+import queue
+import itertools
+import threading
+from collections import deque
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from fire_search_targets import get_all_fire_accounts, get_all_fire_search_combinations
+from browser_session import CHROME_PROFILE_DIR, apply_profile_options, block_heavy_requests, cached_chromedriver_path, load_session_cookies, save_session_cookies, session_is_valid, wait_for_login
+from query_planner import QueryPlan, plan_queries, group_query, scroll_budget, tweet_budget
+from query_scheduler import QueryScheduler
+from raw_tweet_store import RawTweetStore
+from tweet_filter import classify_tweet, filter_tweets_stream
+from run_metrics import METRICS, BufferedLog
+from timeline_capture import TimelineCapture, enable_performance_logging
+from run_checkpoint import RunCheckpoint, checkpoint_path
+from crawl_watermarks import CrawlWatermarks, WATERMARK_OVERLAP, is_newer, is_seen, tweet_mark
 from urllib.parse import quote
 from datetime import datetime, timedelta, timezone
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 import sys
 
 # Date string for filenames
@@ -21,11 +32,55 @@ DATE_STR = datetime.now().strftime('%d%b').lower()  # e.g., '24jul'
 TWITTER_USERNAME = "TechWfm63921"
 TWITTER_PASSWORD = "Pass@123"
 OUTPUT_RAW_FILE = os.path.join(os.path.dirname(__file__), f"{DATE_STR}_tweets_raw.json")
+# Append-only store the crawler writes to; OUTPUT_RAW_FILE is exported from it
+OUTPUT_RAW_STORE = os.path.join(os.path.dirname(__file__), f"{DATE_STR}_tweets_raw.jsonl")
 # Remove unused OUTPUT_CLEANED_FILE
+# "json" exports the day's raw tweets as OUTPUT_RAW_FILE, "parquet" archives them
+# to output/archive/raw/<date>.parquet (tweet_archive, needs pyarrow), "both" does both
+RAW_EXPORT_FORMAT = os.environ.get("RAW_EXPORT_FORMAT", "json")
+if RAW_EXPORT_FORMAT not in ("json", "parquet", "both"):
+    print(f"Error: RAW_EXPORT_FORMAT must be json, parquet or both, got {RAW_EXPORT_FORMAT!r}")
+    exit(1)
+if RAW_EXPORT_FORMAT in ("parquet", "both"):
+    # Fail now rather than at export time, after the whole crawl
+    from tweet_archive import require_pyarrow
+    try:
+        require_pyarrow()
+    except RuntimeError as e:
+        print(f"Error: RAW_EXPORT_FORMAT={RAW_EXPORT_FORMAT}: {e}")
+        exit(1)
+# Number of parallel headless browsers; 1 keeps the original single-driver crawl
+CRAWL_WORKERS = int(os.environ.get("CRAWL_WORKERS", "1"))
+# Times a query goes back on the queue after a browser error in a parallel worker
+QUERY_RETRIES = 2
+# Upper bounds for the condition-driven waits in scrape_recent_tweets_for_query
+PAGE_LOAD_TIMEOUT = 15
+SCROLL_SETTLE_TIMEOUT = 4
+# "dom" reads rendered articles; "network" parses the SearchTimeline API responses
+CRAWL_CAPTURE_MODE = os.environ.get("CRAWL_CAPTURE_MODE", "dom")
+# Site the crawler talks to; benchmark_pipeline.py points it at a local stand-in
+TWITTER_BASE_URL = os.environ.get("TWITTER_BASE_URL", "https://twitter.com").rstrip("/")
+# Stop a live search once it reaches the newest tweet stored by an earlier run
+CRAWL_INCREMENTAL = os.environ.get("CRAWL_INCREMENTAL", "1") == "1"
+# "flat": one search per state x keyword and per account; "combined": OR-ed
+# searches from query_planner, split again when a result comes back truncated
+QUERY_PLAN = os.environ.get("QUERY_PLAN", "flat")
+# Verify new tweets that pass the 72h filter while the crawl is still running
+PIPELINE = os.environ.get("PIPELINE", "0") == "1"
+# Tweets waiting for the verifier; when full, saving a tweet blocks the crawl
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "200"))
+# Seconds a failed crawl waits for the verifier to finish the queued tweets
+PIPELINE_DRAIN_TIMEOUT = float(os.environ.get("PIPELINE_DRAIN_TIMEOUT", "300"))
 
 # Setup WebDriver
 
-def setup_driver():
+def setup_driver(worker_id=0):
+    with METRICS.timer("setup_driver", worker=worker_id):
+        driver = _start_driver(worker_id)
+    return driver
+
+def _start_driver(worker_id):
+    started = time.time()
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
@@ -33,173 +88,573 @@ def setup_driver():
     # Only set binary_location on Linux
     if sys.platform.startswith("linux"):
         chrome_options.binary_location = "/usr/bin/google-chrome"
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    if CRAWL_CAPTURE_MODE == "network":
+        enable_performance_logging(chrome_options)
+    apply_profile_options(chrome_options, worker_id)
+    driver = webdriver.Chrome(service=Service(cached_chromedriver_path()), options=chrome_options)
+    block_heavy_requests(driver)
+    log_print(f"[TIMING] Chrome started in {time.time() - started:.1f}s")
     return driver
 
+_raw_store = None
+
+def get_raw_store():
+    global _raw_store
+    if _raw_store is None:
+        _raw_store = RawTweetStore(OUTPUT_RAW_STORE, legacy_json_path=OUTPUT_RAW_FILE)
+    return _raw_store
+
+_pipeline_feed = None
+_watermarks = None
+
+def get_watermarks():
+    global _watermarks
+    if _watermarks is None:
+        _watermarks = CrawlWatermarks()
+    return _watermarks
+
+def advance_watermark(query, mark):
+    # Called only after the query's tweets are saved, so a crash mid-query
+    # never moves the watermark past tweets that were not stored
+    if mark and get_watermarks().advance(query, mark):
+        log_print(f"[INFO] Watermark for Query='{query}' advanced to {mark['timestamp']} (id {mark['tweet_id'] or 'n/a'})")
+
+def finish_query(query, stats, children, checkpoint=None):
+    # Runs only once the query's tweets are saved, so neither the watermark
+    # nor the checkpoint can get ahead of the raw store
+    advance_watermark(query, stats["newest"])
+    if checkpoint:
+        checkpoint.record({"query": query, "stop_reason": stats["stop_reason"], "tweets": stats["tweets"], "children": children})
+
 def load_existing_tweets(raw=True):
-    file_path = OUTPUT_RAW_FILE if raw else None
-    if file_path and os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return []
-    return []
+    if not raw:
+        return []
+    return list(get_raw_store())
 
 def save_tweet(tweet_data, raw=True):
-    file_path = OUTPUT_RAW_FILE if raw else None
-    # Always reload, deduplicate, and overwrite
-    existing_tweets = load_existing_tweets(raw=raw)
-    # Remove any duplicate (by content, timestamp, and username)
-    is_duplicate = any(
-        tweet_data.get("content") == t.get("content") and
-        tweet_data.get("timestamp") == t.get("timestamp") and
-        tweet_data.get("username") == t.get("username")
-        for t in existing_tweets
-    )
-    if not is_duplicate:
-        existing_tweets.append(tweet_data)
-    # Overwrite the file with deduplicated list
-    with open(file_path, "w", encoding="utf-8") as file:
-        json.dump(existing_tweets, file, indent=4, ensure_ascii=False)
-    print(f"✅ Tweet saved: {tweet_data['content'][:50]}... (raw)")
+    # O(1): hash lookup against the persisted index, then a single appended line
+    with METRICS.timer("save_tweet"):
+        is_new = get_raw_store().add(tweet_data)
+    METRICS.incr("tweets.new" if is_new else "tweets.duplicate")
+    if is_new:
+        print(f"✅ Tweet saved: {tweet_data['content'][:50]}... (raw)")
+        if _pipeline_feed:
+            _pipeline_feed(tweet_data)
+    return is_new
+
+def export_raw_tweets(json_path=OUTPUT_RAW_FILE):
+    with METRICS.timer("json.export_raw"):
+        return get_raw_store().export_json(json_path)
 
 def twitter_login(driver):
-    driver.get("https://twitter.com/login")
+    with METRICS.timer("twitter_login") as fields:
+        fields["reused_session"] = _login(driver)
+
+def _login(driver):
+    # Returns True when a saved session was reused
+    started = time.time()
+    # Saved cookies (or a persistent profile) usually still hold a live session
+    if (load_session_cookies(driver) or CHROME_PROFILE_DIR) and session_is_valid(driver, f"{TWITTER_BASE_URL}/home"):
+        log_print(f"[TIMING] Reused saved Twitter session in {time.time() - started:.1f}s")
+        return True
+    driver.get(f"{TWITTER_BASE_URL}/login")
     try:
         username_input = WebDriverWait(driver, 20).until(
             EC.presence_of_element_located((By.NAME, "text"))
         )
         username_input.send_keys(TWITTER_USERNAME)
         username_input.send_keys(Keys.RETURN)
-        time.sleep(3)
         password_input = WebDriverWait(driver, 20).until(
             EC.presence_of_element_located((By.NAME, "password"))
         )
         password_input.send_keys(TWITTER_PASSWORD)
         password_input.send_keys(Keys.RETURN)
-        time.sleep(5)
+        if wait_for_login(driver):
+            save_session_cookies(driver)
+            log_print(f"[TIMING] Logged in to Twitter in {time.time() - started:.1f}s")
+        else:
+            log_print(f"[WARN] No auth_token cookie after login (extra verification step?); session not saved")
+        return False
     except Exception as e:
         print(f"Error during Twitter login: {e}")
         print("Page source for debugging:")
         print(driver.page_source)
         raise
 
-def scrape_recent_tweets_for_query(driver, query, max_tweets=10, scroll_times=4, mode="live", tab_index=0):
+# Reads every rendered article in one execute_script round trip. The selectors
+# mirror the per-element XPaths this replaced; "missing" lists required fields
+# whose element is absent, which used to raise in find_element.
+EXTRACT_ARTICLES_JS = """
+return Array.from(document.querySelectorAll("article[role='article']")).map(function (article) {
+    var user = article.querySelector("div[dir='ltr'] > span");
+    var text = article.querySelector("div[lang]");
+    var time = article.querySelector("time");
+    var link = time && time.parentElement && time.parentElement.tagName === "A" ? time.parentElement : null;
+    var retweet = article.querySelector("div[data-testid='retweet']");
+    var like = article.querySelector("div[data-testid='like']");
+    var missing = [];
+    if (!user) { missing.push("username"); }
+    if (!text) { missing.push("content"); }
+    if (!time) { missing.push("time"); }
+    return {
+        missing: missing,
+        username: user ? user.innerText.trim() : null,
+        content: text ? text.innerText.trim() : null,
+        timestamp: time ? time.getAttribute("datetime") : null,
+        tweet_url: link ? link.href : null,
+        retweets: retweet ? retweet.textContent : null,
+        likes: like ? like.textContent : null,
+        media: Array.from(article.querySelectorAll("img[src*='twimg']")).map(function (img) { return img.src; })
+    };
+});
+"""
+
+def extract_visible_tweets(driver, query):
+    tweets = []
+    with METRICS.timer("scrape.extract"):
+        items = driver.execute_script(EXTRACT_ARTICLES_JS) or []
+    for item in items:
+        if item["missing"]:
+            print(f"⚠️ Skipping tweet due to error: no element for {', '.join(item['missing'])}")
+            continue
+        tweets.append({
+            "username": item["username"],
+            "content": item["content"],
+            "timestamp": item["timestamp"],
+            "tweet_url": item["tweet_url"] or "URL Not Found",
+            "retweets": item["retweets"] or "0",
+            "likes": item["likes"] or "0",
+            "media": item["media"],
+            "search_query": query,
+            "source_account": item["username"]
+        })
+    return tweets
+
+def wait_for_timeline_growth(driver, previous_height, previous_count, timeout=SCROLL_SETTLE_TIMEOUT):
+    # Returns as soon as the timeline grows instead of sleeping a fixed interval
+    def grown(d):
+        height, count = d.execute_script(
+            "return [document.body.scrollHeight, document.querySelectorAll(\"article[role='article']\").length];"
+        )
+        return height > previous_height or count != previous_count
+    try:
+        with METRICS.timer("scrape.scroll_wait"):
+            WebDriverWait(driver, timeout, poll_frequency=0.25).until(grown)
+        return True
+    except TimeoutException:
+        METRICS.incr("scrape.scroll_timeouts")
+        return False
+
+def scrape_recent_tweets_for_query(driver, query, max_tweets=10, scroll_times=4, mode="live", tab_index=0, save=None):
+    if save is None:
+        save = save_tweet
+    started = time.time()
     encoded_query = quote(query)
     if mode == "live":
-        search_url = f"https://twitter.com/search?q={encoded_query}&f=live"
+        search_url = f"{TWITTER_BASE_URL}/search?q={encoded_query}&f=live"
     else:
-        search_url = f"https://twitter.com/search?q={encoded_query}&f=top"
-    driver.get(search_url)
-    time.sleep(7)
-    for _ in range(scroll_times):
-        driver.execute_script("window.scrollBy(0, window.innerHeight);")
-        time.sleep(random.uniform(2, 4))
-    tweet_elements = driver.find_elements(By.XPATH, "//article[@role='article']")
-    tweets_scraped = 0
-    for tweet in tweet_elements:
-        if tweets_scraped >= max_tweets:
-            break
+        search_url = f"{TWITTER_BASE_URL}/search?q={encoded_query}&f=top"
+    capture = TimelineCapture(driver) if CRAWL_CAPTURE_MODE == "network" else None
+    # Only live results are newest-first; "top" ordering says nothing about what is older
+    watermark = get_watermarks().get(query) if CRAWL_INCREMENTAL and mode == "live" else None
+    if capture:
+        capture.reset()
+    stats = {"query": query, "tweets": 0, "new_tweets": 0, "scrolls": 0, "stop_reason": "", "elapsed": 0.0, "newest": None}
+    with METRICS.timer("scrape.page_load"):
+        driver.get(search_url)
         try:
-            username = tweet.find_element(By.XPATH, ".//div[@dir='ltr']/span").text
-            content = tweet.find_element(By.XPATH, ".//div[@lang]").text
-            timestamp = tweet.find_element(By.XPATH, ".//time").get_attribute("datetime")
-            try:
-                href = tweet.find_element(By.XPATH, ".//time/parent::a").get_attribute("href")
-                tweet_url = href
-            except:
-                tweet_url = "URL Not Found"
-            try:
-                retweets = tweet.find_element(By.XPATH, ".//div[@data-testid='retweet']").get_attribute("textContent") or "0"
-            except:
-                retweets = "0"
-            try:
-                likes = tweet.find_element(By.XPATH, ".//div[@data-testid='like']").get_attribute("textContent") or "0"
-            except:
-                likes = "0"
-            media = tweet.find_elements(By.XPATH, ".//img[contains(@src, 'twimg')]")
-            media_urls = [img.get_attribute("src") for img in media]
-            tweet_data = {
-                "username": username,
-                "content": content,
-                "timestamp": timestamp,
-                "tweet_url": tweet_url,
-                "retweets": retweets,
-                "likes": likes,
-                "media": media_urls,
-                "search_query": query,
-                "source_account": username
-            }
-            save_tweet(tweet_data, raw=True)
-            tweets_scraped += 1
-        except Exception as e:
-            print(f"⚠️ Skipping tweet due to error: {e}")
-            continue
+            WebDriverWait(driver, PAGE_LOAD_TIMEOUT, poll_frequency=0.25).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "article[role='article']"))
+            )
+            stats["stop_reason"] = "scroll_limit"
+        except TimeoutException:
+            stats["stop_reason"] = "no_results"
+    seen_tweets = set()
+    seen_in_row = 0
+    while stats["stop_reason"] == "scroll_limit":
+        new_in_pass = 0
+        if capture:
+            with METRICS.timer("scrape.extract"):
+                scraped = capture.collect(query)
+        else:
+            scraped = extract_visible_tweets(driver, query)
+        for tweet_data in scraped:
+            if stats["tweets"] >= max_tweets:
+                break
+            key = (tweet_data["username"], tweet_data["timestamp"], tweet_data["content"])
+            if key in seen_tweets:
+                continue
+            seen_tweets.add(key)
+            if is_seen(tweet_data, watermark):
+                seen_in_row += 1
+                if seen_in_row >= WATERMARK_OVERLAP:
+                    stats["stop_reason"] = "watermark"
+                    break
+                continue
+            seen_in_row = 0
+            mark = tweet_mark(tweet_data)
+            if is_newer(mark, stats["newest"]):
+                stats["newest"] = mark
+            # save_tweet returns False for tweets the store already has; the
+            # parallel crawl's save only queues, and its writer counts instead
+            if save(tweet_data):
+                stats["new_tweets"] += 1
+            stats["tweets"] += 1
+            new_in_pass += 1
+        if stats["stop_reason"] == "watermark":
+            break
+        if stats["tweets"] >= max_tweets:
+            stats["stop_reason"] = "max_tweets"
+            break
+        if stats["scrolls"] and not new_in_pass:
+            stats["stop_reason"] = "no_new_tweets"
+            break
+        if stats["scrolls"] >= scroll_times:
+            break
+        height, count = driver.execute_script(
+            "return [document.body.scrollHeight, document.querySelectorAll(\"article[role='article']\").length];"
+        )
+        driver.execute_script("window.scrollBy(0, window.innerHeight);")
+        stats["scrolls"] += 1
+        wait_for_timeline_growth(driver, height, count)
+    stats["elapsed"] = time.time() - started
+    METRICS.observe("scrape_query", stats["elapsed"])
+    METRICS.event("scrape_query", query=query, tweets=stats["tweets"], scrolls=stats["scrolls"], stop_reason=stats["stop_reason"], seconds=round(stats["elapsed"], 3))
+    METRICS.incr(f"scrape.stop.{stats['stop_reason']}")
+    if not CRAWL_INCREMENTAL or mode != "live":
+        stats["newest"] = None
+    # What the old fixed schedule would have slept: 7 s load + 2-4 s per scroll
+    fixed_baseline = 7 + scroll_times * 3
+    log_print(
+        f"[TIMING] Query='{query}' | Tweets={stats['tweets']} | Scrolls={stats['scrolls']}/{scroll_times} | "
+        f"Stop={stats['stop_reason']} | {stats['elapsed']:.1f}s (fixed-sleep baseline ~{fixed_baseline}s)"
+    )
+    return stats
 
 LOG_FILE = os.path.join(os.path.dirname(__file__), f"logs_{DATE_STR}.log")
 
+# Written in batches (and at exit) rather than reopened for every message
+_log_sink = BufferedLog(LOG_FILE)
+
+def set_log_file(path):
+    global LOG_FILE
+    LOG_FILE = path
+    _log_sink.set_path(path)
+
 def log_print(msg):
     print(msg)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(msg + "\n")
+    _log_sink.write(msg)
 
 def filter_tweets_last_72_hours(input_path, output_path):
-    from datetime import datetime, timezone
-    with open(input_path, "r", encoding="utf-8") as f:
-        tweets = json.load(f)
-    now = datetime.now(timezone.utc)
-    filtered = []
-    for tweet in tweets:
-        ts = tweet.get("timestamp", "")
-        content = tweet.get("content", "")
-        try:
-            tweet_time = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-            within_72h = (now - tweet_time).total_seconds() <= 72 * 3600
-            long_enough = len(content.strip()) >= 30
-            log_print(f"[DEBUG] Tweet timestamp: {ts} | Now: {now.isoformat()} | Within 72h: {within_72h} | Content length: {len(content.strip())} | Long enough: {long_enough}")
-            if within_72h and long_enough:
-                filtered.append(tweet)
-                # Save live after each addition
-                with open(output_path, "w", encoding="utf-8") as f_out:
-                    json.dump(filtered, f_out, indent=4, ensure_ascii=False)
-        except Exception as e:
-            log_print(f"[DEBUG] Error parsing timestamp '{ts}': {e}")
-            continue
-    log_print(f"Filtered {len(filtered)} tweets from last 72 hours to {output_path}")
-
-def main():
-    combinations = get_all_fire_search_combinations()
-    accounts = get_all_fire_accounts()
-    queries = []
-    for combo in combinations:
-        queries.append((combo, "live", 10))
-    for account in accounts:
-        query = f'from:{account}'
-        queries.append((query, "live", 10))
+    # Streams the raw store (JSONL or JSON array) into the cleaned JSON array
+    stats = filter_tweets_stream(input_path, output_path, hours=72, min_length=30, log=log_print)
+    log_print(f"Filtered {stats['accepted']} tweets from last 72 hours to {output_path}")
+    return stats
+
+def planned_item(group, mode="live"):
+    return (group_query(group), mode, scroll_budget(group), group)
+
+def unfinished_queries(queries, checkpoint):
+    # Planned queries plus the splits checkpointed so far, minus the queries
+    # the checkpoint already holds
+    completed = {entry["query"] for entry in checkpoint.entries if "query" in entry}
+    splits = [planned_item(child, "live") for entry in checkpoint.entries for child in entry.get("children", [])]
+    return [item for item in queries + splits if item[0] not in completed]
+
+def crawl_queries_sequential(queries, plan, scheduler, checkpoint=None):
+    pending = deque(queries)
     total_queries = len(queries)
-    log_print(f"[INFO] Total queries to process: {total_queries}")
     log_print(f"[INFO] Starting Chrome WebDriver...")
     driver = setup_driver()
     log_print(f"[INFO] WebDriver started.")
     log_print(f"[INFO] Logging into Twitter...")
     twitter_login(driver)
     log_print(f"[INFO] Twitter login successful.")
-    for idx, (query, mode, scroll_times) in enumerate(queries, 1):
+    idx = 0
+    while pending:
+        if scheduler.out_of_time():
+            log_print(f"[INFO] Crawl time budget spent; skipping {len(pending)} lower-yield queries")
+            scheduler.skip(len(pending))
+            break
+        query, mode, scroll_times, group = pending.popleft()
+        idx += 1
         log_print(f"[INFO] Processing tab {idx}/{total_queries}: Query='{query}' | Mode={mode} | Scrolls={scroll_times}")
-        scrape_recent_tweets_for_query(driver, query, mode=mode, scroll_times=scroll_times)
+        stats = scrape_recent_tweets_for_query(driver, query, max_tweets=tweet_budget(group), mode=mode, scroll_times=scroll_times)
+        scheduler.record_crawl(query, stats)
+        children = plan.record(group, stats)
+        finish_query(query, stats, children, checkpoint)
+        if children:
+            log_print(f"[INFO] Query='{query}' was truncated ({stats['stop_reason']}); splitting into {len(children)} queries")
+            pending.extend(planned_item(child, mode) for child in children)
+            total_queries += len(children)
         log_print(f"[INFO] Finished processing tab {idx}/{total_queries}: Query='{query}'")
         time.sleep(random.uniform(2, 4))
+    scheduler.save()
     log_print(f"[INFO] Quitting WebDriver...")
     driver.quit()
     log_print(f"[INFO] WebDriver stopped.")
-    RAW_PATH = OUTPUT_RAW_FILE
+
+def crawl_queries_parallel(queries, num_workers, plan, scheduler, checkpoint=None):
+    # Each worker owns one logged-in headless driver and pulls queries from a
+    # shared queue. Workers never touch the raw store: scraped tweets go through
+    # a results queue to a single writer thread.
+    total_queries = len(queries)
+    query_queue = queue.Queue()
+    for item in queries:
+        query_queue.put(item)
+    results = queue.Queue(maxsize=1000)
+    progress = {"done": 0, "total": total_queries}
+    progress_lock = threading.Lock()
+    attempts = {}
+    # Tweets per query the store accepted as new, filled in by the writer
+    new_tweets = {}
+
+    def writer():
+        while True:
+            tweet_data = results.get()
+            if tweet_data is None:
+                break
+            if isinstance(tweet_data, tuple):
+                # (query, stats, children) queued after the query's tweets: they are saved by now
+                query, stats, children = tweet_data
+                stats["new_tweets"] = new_tweets.pop(query, 0)
+                scheduler.record_crawl(query, stats)
+                finish_query(query, stats, children, checkpoint)
+                continue
+            if save_tweet(tweet_data, raw=True):
+                new_tweets[tweet_data["search_query"]] = new_tweets.get(tweet_data["search_query"], 0) + 1
+
+    def start_driver(worker_id):
+        try:
+            log_print(f"[INFO] Worker {worker_id}: starting Chrome WebDriver and logging in...")
+            driver = setup_driver(worker_id)
+        except Exception as e:
+            log_print(f"[ERROR] Worker {worker_id}: startup failed, leaving its queries to other workers: {e}")
+            return None
+        try:
+            twitter_login(driver)
+        except Exception as e:
+            log_print(f"[ERROR] Worker {worker_id}: login failed, leaving its queries to other workers: {e}")
+            driver.quit()
+            return None
+        return driver
+
+    def worker(worker_id):
+        # Stagger logins so the account does not see a burst of simultaneous sessions
+        time.sleep(worker_id * random.uniform(2, 4))
+        driver = start_driver(worker_id)
+        if driver is None:
+            return
+        try:
+            while True:
+                try:
+                    query, mode, scroll_times, group = query_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if scheduler.out_of_time():
+                    # Drain the queue so every worker stops at the budget
+                    scheduler.skip()
+                    continue
+                stats = None
+                try:
+                    stats = scrape_recent_tweets_for_query(driver, query, max_tweets=tweet_budget(group), mode=mode, scroll_times=scroll_times, save=results.put)
+                except WebDriverException as e:
+                    # Usually this worker's browser died: hand the query back to the
+                    # queue and restart the driver, or stop the worker if that fails
+                    with progress_lock:
+                        attempts[query] = attempts.get(query, 0) + 1
+                        retry = attempts[query] <= QUERY_RETRIES
+                    if retry:
+                        log_print(f"[WARN] Worker {worker_id}: browser error on query '{query}', requeued (attempt {attempts[query]}/{QUERY_RETRIES}): {e}")
+                        query_queue.put((query, mode, scroll_times, group))
+                    else:
+                        log_print(f"[ERROR] Worker {worker_id}: query '{query}' failed after {QUERY_RETRIES} retries: {e}")
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = start_driver(worker_id)
+                    if driver is None:
+                        break
+                    if retry:
+                        continue
+                except Exception as e:
+                    log_print(f"[ERROR] Worker {worker_id}: query '{query}' failed: {e}")
+                children = plan.record(group, stats)
+                if stats is not None:
+                    results.put((query, stats, children))
+                for child in children:
+                    query_queue.put(planned_item(child, mode))
+                with progress_lock:
+                    progress["done"] += 1
+                    progress["total"] += len(children)
+                    done, total = progress["done"], progress["total"]
+                if children:
+                    log_print(f"[INFO] Worker {worker_id}: Query='{query}' was truncated ({stats['stop_reason']}); split into {len(children)} queries")
+                log_print(f"[INFO] Worker {worker_id}: finished {done}/{total}: Query='{query}'")
+                time.sleep(random.uniform(2, 4))
+        finally:
+            if driver is not None:
+                driver.quit()
+                log_print(f"[INFO] Worker {worker_id}: WebDriver stopped.")
+
+    log_print(f"[INFO] Starting {num_workers} parallel crawl workers...")
+    writer_thread = threading.Thread(target=writer, name="raw-writer", daemon=True)
+    writer_thread.start()
+    workers = [
+        threading.Thread(target=worker, args=(i,), name=f"crawl-worker-{i}", daemon=True)
+        for i in range(num_workers)
+    ]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    results.put(None)
+    writer_thread.join()
+    scheduler.save()
+    if not query_queue.empty():
+        log_print(f"[WARN] {query_queue.qsize()} queries were not processed (all workers stopped).")
+    log_print(f"[INFO] Parallel crawl finished: {progress['done']}/{progress['total']} queries processed.")
+
+class TweetFeed:
+    # Bounded hand-off from the crawler to the pipeline's verifier thread.
+    # Applies the same 72h/length filter as filter_tweets_last_72_hours.
+    def __init__(self, maxsize=PIPELINE_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = {"accepted": 0, "too_old": 0, "too_short": 0, "not_relevant": 0, "bad_timestamp": 0}
+        self.consumer = None
+
+    def _put(self, item):
+        while True:
+            try:
+                self.queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                # A dead verifier must not stall the crawl forever
+                if self.consumer is not None and not self.consumer.is_alive():
+                    return
+
+    def put(self, tweet_data):
+        result = classify_tweet(tweet_data)
+        self.stats[result] += 1
+        if result == "accepted":
+            self._put(tweet_data)
+
+    def close(self):
+        self._put(None)
+
+    def __iter__(self):
+        while True:
+            tweet_data = self.queue.get()
+            if tweet_data is None:
+                return
+            yield tweet_data
+
+def crawl_and_verify_pipelined(crawl, checkpoint_name=None, resume=False):
+    # Runs crawl() with every newly saved tweet streaming into the verifier,
+    # so the API-bound verifier works while the browser-bound crawler does
+    global _pipeline_feed
+    from ai_fire_verifier import verify_and_save_tweets
+    feed = TweetFeed()
+    # Tweets stored by an earlier run today are verified too, as in the phased flow
+    backlog = [tweet for tweet in get_raw_store() if classify_tweet(tweet) == "accepted"]
+    errors = []
+
+    def verify():
+        try:
+            verify_and_save_tweets(itertools.chain(backlog, feed), checkpoint_name=checkpoint_name, resume=resume)
+        except Exception as e:
+            log_print(f"[ERROR] Pipeline verifier failed: {e}")
+            errors.append(e)
+
+    started = time.time()
+    verifier = threading.Thread(target=verify, name="pipeline-verifier", daemon=True)
+    feed.consumer = verifier
+    verifier.start()
+    _pipeline_feed = feed.put
+    crawled = False
+    try:
+        crawl()
+        crawled = True
+    finally:
+        _pipeline_feed = None
+        feed.close()
+        if not crawled:
+            # The verifier is a daemon thread: without this the exiting process
+            # would cut it off mid-batch, before its Excel and journal writes
+            log_print(f"[ERROR] Crawl failed; waiting up to {PIPELINE_DRAIN_TIMEOUT:.0f}s for the verifier to finish the queued tweets...")
+            verifier.join(PIPELINE_DRAIN_TIMEOUT)
+    crawl_finished = time.time()
+    log_print(f"[INFO] Crawl finished; waiting for the verifier to drain {feed.queue.qsize()} queued tweets...")
+    verifier.join()
+    finished = time.time()
+    log_print(f"[INFO] Pipeline filter: {len(backlog)} stored + {feed.stats['accepted']} new tweets verified | "
+              f"older than 72h {feed.stats['too_old']} | too short {feed.stats['too_short']} | not relevant {feed.stats['not_relevant']} | bad timestamp {feed.stats['bad_timestamp']}")
+    log_print(f"[TIMING] Pipeline: crawl {crawl_finished - started:.1f}s, verifier done {finished - crawl_finished:.1f}s later, "
+              f"total {finished - started:.1f}s")
+    if errors:
+        raise errors[0]
+
+def main(resume=False):
+    METRICS.serve()
+    if QUERY_PLAN == "combined":
+        groups = plan_queries()
+    else:
+        # Groups of one term: the same state x keyword and from: searches as before
+        groups = plan_queries(keyword_group_size=1, account_group_size=1)
+    plan = QueryPlan(groups)
+    scheduler = QueryScheduler()
+    # Highest expected verified incidents per crawl-minute first, never-run queries before all
+    queries = scheduler.order([planned_item(group, "live") for group in groups])
+    checkpoint = RunCheckpoint(checkpoint_path(f"crawl_{DATE_STR}"), resume, {"plan": QUERY_PLAN})
+    planned = queries
+    if checkpoint.resumed:
+        # Finished queries are skipped; splits queued by the interrupted run are
+        # added back, whether or not that run marked the crawl finished
+        queries = unfinished_queries(planned, checkpoint)
+        log_print(f"[INFO] Resuming crawl: {sum('query' in entry for entry in checkpoint.entries)} queries already done")
+    total_queries = len(queries)
+    log_print(f"[INFO] Total queries to process: {total_queries} (plan={QUERY_PLAN})")
     CLEANED_PATH = os.path.join(os.path.dirname(__file__), f"{DATE_STR}_cleaned_tweets.json")
+    verify_checkpoint = "verify_" + os.path.splitext(os.path.basename(CLEANED_PATH))[0]
+
+    def crawl():
+        if not queries:
+            log_print(f"[INFO] Crawl already finished in the interrupted run; skipping to verification")
+            return
+        if CRAWL_WORKERS > 1:
+            crawl_queries_parallel(queries, CRAWL_WORKERS, plan, scheduler, checkpoint)
+        else:
+            crawl_queries_sequential(queries, plan, scheduler, checkpoint)
+        # Failed, skipped or never-started queries have no checkpoint entry;
+        # the crawl only counts as finished once every query has one
+        left = unfinished_queries(planned, checkpoint)
+        if left:
+            log_print(f"[WARN] {len(left)} queries did not finish; run with --resume to retry them")
+        else:
+            checkpoint.finish()
+    if PIPELINE:
+        crawl_and_verify_pipelined(crawl, verify_checkpoint, resume)
+    else:
+        crawl()
+    plan.report(log=log_print)
+    scheduler.report(log=log_print)
+    if RAW_EXPORT_FORMAT in ("json", "both"):
+        exported = export_raw_tweets(OUTPUT_RAW_FILE)
+        log_print(f"[INFO] Exported {exported} raw tweets from {OUTPUT_RAW_STORE} to {OUTPUT_RAW_FILE}")
+    if RAW_EXPORT_FORMAT in ("parquet", "both"):
+        from tweet_archive import archive_raw_tweets, archive_path
+        archive_name = datetime.now().strftime("%Y-%m-%d")
+        archived, duplicates = archive_raw_tweets(get_raw_store(), archive_name)
+        log_print(f"[INFO] Archived {archived} raw tweets to {archive_path('raw', archive_name)} ({duplicates} already archived on earlier days)")
+    RAW_PATH = OUTPUT_RAW_STORE
     log_print(f"[INFO] Filtering tweets from raw file to cleaned file...")
     filter_tweets_last_72_hours(RAW_PATH, CLEANED_PATH)
-    log_print(f"[INFO] Running AI verifier on cleaned tweets...")
-    from ai_fire_verifier import verify_and_save_to_excel
-    verify_and_save_to_excel(CLEANED_PATH)
+    if not PIPELINE:
+        log_print(f"[INFO] Running AI verifier on cleaned tweets...")
+        from ai_fire_verifier import verify_and_save_to_excel
+        verify_and_save_to_excel(CLEANED_PATH, resume=resume)
+    METRICS.write_summary(log=log_print)
     log_print(f"[INFO] All steps complete.")
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
@@ -211,4 +666,5 @@ else:
     print(f"OPENAI_API_KEY loaded: {masked_key}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # --resume continues today's interrupted crawl and verification
+    main(resume="--resume" in sys.argv[1:]) 
\ No newline at end of file
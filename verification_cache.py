@@ -0,0 +1,106 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+# On-disk cache of LLM verdicts keyed by normalized tweet content plus the
+# prompt version and model, so overlapping daily runs do not pay twice.
+
+CACHE_PATH = os.getenv("VERIFICATION_CACHE_PATH", "output/verification_cache.sqlite3")
+CACHE_TTL_DAYS = float(os.getenv("VERIFICATION_CACHE_TTL_DAYS", "14"))
+CACHE_MAX_ENTRIES = int(os.getenv("VERIFICATION_CACHE_MAX_ENTRIES", "200000"))
+
+def normalize_content(content):
+    text = unicodedata.normalize("NFKC", content or "").lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+def content_hash(content):
+    return hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
+
+class VerificationCache:
+    def __init__(self, path=CACHE_PATH, prompt_version="", model="", ttl_days=CACHE_TTL_DAYS, max_entries=CACHE_MAX_ENTRIES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.namespace = f"{prompt_version}|{model}"
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Shared by the verifier loop and pipeline threads
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS verifications ("
+            "key TEXT PRIMARY KEY, verdict TEXT NOT NULL, score TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_verifications_created_at ON verifications (created_at)")
+        self.conn.commit()
+
+    def key(self, content):
+        return hashlib.sha256(f"{self.namespace}|{content_hash(content)}".encode("utf-8")).hexdigest()
+
+    def get(self, content):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT verdict, score FROM verifications WHERE key = ? AND created_at >= ?",
+                (self.key(content), time.time() - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0], json.loads(row[1])
+
+    def put(self, content, verdict, score):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO verifications (key, verdict, score, created_at) VALUES (?, ?, ?, ?)",
+                (self.key(content), verdict, json.dumps(score), time.time()),
+            )
+            self.conn.commit()
+
+    def evict(self):
+        with self._lock:
+            expired = self.conn.execute(
+                "DELETE FROM verifications WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            count = self.conn.execute("SELECT COUNT(*) FROM verifications").fetchone()[0]
+            overflow = max(0, count - self.max_entries)
+            if overflow:
+                self.conn.execute(
+                    "DELETE FROM verifications WHERE key IN "
+                    "(SELECT key FROM verifications ORDER BY created_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+            self.conn.commit()
+        return expired + overflow
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        lookups = self.hits + self.misses
+        print(f"🗄️ Verification cache: {self.hits}/{lookups} hits ({self.hit_rate():.1%}), {self.misses} sent to OpenAI")
+
+    def close(self):
+        evicted = self.evict()
+        if evicted:
+            print(f"🗄️ Verification cache: evicted {evicted} expired or overflow entries")
+        self.conn.close()
+
+if __name__ == "__main__":
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else CACHE_PATH
+    cache = VerificationCache(path)
+    total = cache.conn.execute("SELECT COUNT(*) FROM verifications").fetchone()[0]
+    yes = cache.conn.execute("SELECT COUNT(*) FROM verifications WHERE verdict LIKE 'yes%'").fetchone()[0]
+    print(f"{path}: {total} cached verdicts ({yes} yes)")
+    cache.close()